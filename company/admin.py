@@ -1,20 +1,230 @@
+from django import forms
 from django.contrib import admin
-from .models import Company
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.safestring import mark_safe
+from django.utils.text import smart_split, unescape_string_literal
+
+from .cache import invalidate_owner_cache
+from .models import Company, EmailOutbox
+
+
+def get_estimated_count(model, using):
+    """
+    Return the planner's row estimate of the model's table, or None if the
+    database cannot provide one.
+
+    The estimate comes from `pg_class.reltuples`, which VACUUM and ANALYZE keep
+    up to date, so reading it costs the same no matter how large the table is.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+
+    # Tables that were never analyzed report -1
+    if row is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that counts the unfiltered changelist from the table statistics
+    instead of an exact COUNT(*) over the whole table.
+
+    Filtered and searched changelists, as well as small tables, are still
+    counted exactly.
+
+    Attributes:
+        estimate_threshold (int): The estimated row count from which the
+                                  estimate is used instead of an exact count.
+    """
+
+    estimate_threshold = 100000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = get_estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                return estimate
+        return super().count
+
+
+class OwnerFilter(admin.SimpleListFilter):
+    """
+    Filters companies by owner, picked with an autocomplete widget instead of
+    a sidebar link per user.
+
+    Uses the query parameter of the stock `owner` filter, so existing links
+    keep working.
+    """
+
+    title = "owner"
+    parameter_name = "owner__id__exact"
+    template = "admin/company/owner_filter.html"
+
+    def __init__(self, request, params, model, model_admin):
+        self.model_admin = model_admin
+        super().__init__(request, params, model, model_admin)
+
+    def lookups(self, request, model_admin):
+        # Owners are looked up by the widget, never listed
+        return ()
+
+    def has_output(self):
+        return True
+
+    def queryset(self, request, queryset):
+        if self.value() is None:
+            return queryset
+        try:
+            return queryset.filter(owner_id=self.value())
+        except (ValueError, ValidationError) as e:
+            raise IncorrectLookupParameters(e)
+
+    def choices(self, changelist):
+        yield {
+            "selected": self.value() is None,
+            "query_string": changelist.get_query_string(remove=[self.parameter_name]),
+            "display": "All",
+        }
+
+        # The widget navigates to the changelist with the picked owner added
+        field = self.model_admin.formfield_for_foreignkey(
+            Company._meta.get_field("owner"), self.request, required=False
+        )
+        widget = field.widget.render(
+            self.parameter_name,
+            self.value(),
+            attrs={
+                "class": "owner-filter",
+                "data-width": "100%",
+                "data-query-string": changelist.get_query_string(
+                    remove=[self.parameter_name]
+                ),
+            },
+        )
+        yield {"widget": mark_safe(widget)}
 
 
 class CompanyAdmin(admin.ModelAdmin):
     """
     Admin configuration for the Company model in the Django admin interface.
 
+    The changelist is built to stay fast on large tables: owners are joined
+    into the page query, picked with an autocomplete widget, and the
+    unfiltered list is counted from the table statistics.
+
     Attributes:
         list_display (tuple): Specifies the columns to display in the admin list view.
-        search_fields (tuple): Defines which fields are searchable in the admin interface.
+        list_select_related (tuple): Loads the owners with the page in a single join.
+        search_fields (tuple): Searches company names, see `get_search_results`.
         list_filter (tuple): Allows filtering of companies by owner in the admin list view.
+        autocomplete_fields (tuple): Picks the owner on the change form without listing all users.
+        paginator (Paginator): Counts the unfiltered changelist from the table statistics.
+        show_full_result_count (bool): Skips the second, unfiltered COUNT on filtered pages.
     """
 
     list_display = ("company_name", "owner", "number_of_employees")
-    search_fields = ("company_name", "owner__username")
-    list_filter = ("owner",)
+    list_select_related = ("owner",)
+    search_fields = ("company_name",)
+    list_filter = (OwnerFilter,)
+    autocomplete_fields = ("owner",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        """
+        Add the autocomplete assets and the script driving the owner filter.
+        """
+        owner = self.model._meta.get_field("owner")
+        return (
+            super().media
+            + AutocompleteSelect(owner, self.admin_site).media
+            + forms.Media(js=["company/js/owner_filter.js"])
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Match each search term against the company name, or the exact username
+        of the owner.
+
+        Usernames are resolved to owner ids by a separate lookup on the unique
+        username index, so the search filters the company table alone. Joining
+        the users into an OR condition would keep the planner from using the
+        trigram index on the company name.
+        """
+        terms = []
+        for term in smart_split(search_term):
+            if term.startswith(('"', "'")) and term[0] == term[-1]:
+                term = unescape_string_literal(term)
+            terms.append(term)
+        if not terms:
+            return queryset, False
+
+        owner_ids = dict(
+            User.objects.filter(username__in=terms).values_list("username", "id")
+        )
+        for term in terms:
+            queryset = queryset.filter(
+                self.get_search_condition(term, owner_ids.get(term))
+            )
+        return queryset, False
+
+    @staticmethod
+    def get_search_condition(term, owner_id=None):
+        """
+        Return the filter matching one search term.
+
+        Args:
+            term (str): The search term.
+            owner_id (int): Id of the user whose username is the term, if any.
+        """
+        condition = Q(company_name__icontains=term)
+        if owner_id is not None:
+            condition |= Q(owner_id=owner_id)
+        return condition
+
+    def save_model(self, request, obj, form, change):
+        """
+        Saves the company and invalidates the cached responses of its owners.
+        """
+        super().save_model(request, obj, form, change)
+        invalidate_owner_cache(obj.owner_id)
+        if change and "owner" in form.changed_data:
+            invalidate_owner_cache(form.initial["owner"])
+
+    def delete_model(self, request, obj):
+        """
+        Deletes the company and invalidates the cached responses of its owner.
+        """
+        super().delete_model(request, obj)
+        invalidate_owner_cache(obj.owner_id)
+
+    def delete_queryset(self, request, queryset):
+        """
+        Deletes the companies and invalidates the cached responses of their owners.
+        """
+        owner_ids = set(queryset.values_list("owner_id", flat=True))
+        super().delete_queryset(request, queryset)
+        for owner_id in owner_ids:
+            invalidate_owner_cache(owner_id)
 
     # def has_delete_permission(self, request, obj=None):
     #     """
@@ -32,4 +242,20 @@ class CompanyAdmin(admin.ModelAdmin):
     #     return actions
 
 
+class EmailOutboxAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for inspecting queued and failed emails.
+
+    Attributes:
+        list_display (tuple): Specifies the columns to display in the admin list view.
+        list_filter (tuple): Allows filtering of emails by delivery status.
+        readonly_fields (tuple): Delivery bookkeeping that is managed by the worker.
+    """
+
+    list_display = ("subject", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    readonly_fields = ("attempts", "last_error", "created_at", "sent_at")
+
+
 admin.site.register(Company, CompanyAdmin)
+admin.site.register(EmailOutbox, EmailOutboxAdmin)
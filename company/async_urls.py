@@ -0,0 +1,14 @@
+from django.urls import path
+
+from .async_views import ASYNC_VIEWS
+from .urls import urlpatterns as sync_urlpatterns
+
+# The routes of urls.py, with the native async views where there is one
+urlpatterns = [
+    (
+        path(str(route.pattern), ASYNC_VIEWS[route.name].as_view(), name=route.name)
+        if route.name in ASYNC_VIEWS
+        else route
+    )
+    for route in sync_urlpatterns
+]
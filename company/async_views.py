@@ -0,0 +1,283 @@
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.db.models import F
+from django.utils.functional import classproperty
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from company.models import Company
+from .cache import (
+    aget_cached_response,
+    ainvalidate_owner_cache,
+    amake_cache_key,
+    aset_cached_response,
+)
+from .conditional import PreconditionFailed
+from .idempotency import IdempotentRequest
+from .serializers import CompanyListSerializer
+from .views import (
+    CreateCompanyView,
+    ExportUserCompaniesView,
+    ListUserCompaniesView,
+    RetrieveUserCompanyView,
+    UpdateCompanyView,
+    respond_from_cache,
+)
+
+
+class AsyncViewMixin:
+    """
+    Serves the handlers of a DRF view as coroutines, so under an ASGI server a
+    request doesn't hold a thread while it waits on the database.
+
+    DRF only dispatches synchronously, so this mirrors `APIView.dispatch`.
+    Content negotiation, authentication, permissions and throttling may query
+    the database and run in a worker thread, the handler itself is awaited on
+    the event loop and is expected to use the async ORM.
+    """
+
+    @classproperty
+    def view_is_async(cls):
+        return True
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            # OPTIONS and 405 are answered by DRF's synchronous handlers
+            response = handler(request, *args, **kwargs)
+            if hasattr(response, "__await__"):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+def inherit_swagger_schema(view_class):
+    """
+    Class decorator giving the async handlers the Swagger documentation of
+    the synchronous handlers they override.
+    """
+    for method in view_class.http_method_names:
+        handler = view_class.__dict__.get(method)
+        parent = getattr(super(view_class, view_class), method, None)
+        if handler is not None and hasattr(parent, "_swagger_auto_schema"):
+            handler._swagger_auto_schema = parent._swagger_auto_schema
+    return view_class
+
+
+@inherit_swagger_schema
+class AsyncCreateCompanyView(AsyncViewMixin, CreateCompanyView):
+    """
+    Async version of `CreateCompanyView`.
+
+    The async ORM can't run transactions, so the limit check, the insert and
+    queueing the confirmation email run together in one worker thread. The
+    email itself is delivered by the outbox worker, never by the request.
+    """
+
+    async def post(self, request, *args, **kwargs):
+        error = self.check_request(request)
+        if error is not None:
+            return error
+
+        idempotent = IdempotentRequest.from_request(request)
+        if idempotent is None:
+            return await self.acreate(request)
+
+        replayed = await idempotent.abegin()
+        if replayed is not None:
+            return replayed
+
+        response = None
+        try:
+            response = await self.acreate(request)
+        except Exception as exc:
+            # Client errors are replayed like successes, server errors re-raise
+            response = self.handle_exception(exc)
+        finally:
+            await idempotent.afinish(response)
+
+        return response
+
+    async def acreate(self, request):
+        """
+        Async version of `create`.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        await sync_to_async(self.perform_create)(serializer)
+
+        headers = self.get_success_headers(serializer.data)
+        return Response(
+            serializer.data, status=status.HTTP_201_CREATED, headers=headers
+        )
+
+
+@inherit_swagger_schema
+class AsyncListUserCompaniesView(AsyncViewMixin, ListUserCompaniesView):
+    """
+    Async version of `ListUserCompaniesView`, the count and the page are
+    fetched with the async ORM and the cache is used through its async API.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        params = self.get_list_params(request)
+
+        # Serve the page from the per-owner cache when possible
+        cache_key = await amake_cache_key(
+            request.user.id, "list", **self.get_cache_params(request, params)
+        )
+        cached = await aget_cached_response(cache_key)
+        if cached is not None:
+            return respond_from_cache(request, cached)
+
+        companies, paginator = self.get_page_queryset(request, params)
+        paginated_companies = await paginator.apaginate_queryset(companies, request)
+
+        response = self.get_page_response(
+            request, paginator, paginated_companies, params
+        )
+        if response.status_code == status.HTTP_200_OK:
+            await aset_cached_response(
+                cache_key, {"etag": response["ETag"], "data": response.data}
+            )
+
+        return response
+
+
+@inherit_swagger_schema
+class AsyncRetrieveUserCompanyView(AsyncViewMixin, RetrieveUserCompanyView):
+    """
+    Async version of `RetrieveUserCompanyView`.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        fields = CompanyListSerializer.parse_fields(request.query_params.get("fields"))
+        cache_key = await amake_cache_key(
+            request.user.id, "detail", pk=self.kwargs["pk"], fields=",".join(fields)
+        )
+        cached = await aget_cached_response(cache_key)
+        if cached is not None:
+            return respond_from_cache(request, cached)
+
+        try:
+            company = await self.get_company_queryset(fields).aget()
+        except Company.DoesNotExist:
+            raise self.not_found()
+
+        response = self.get_company_response(request, company, fields)
+        if response.status_code == status.HTTP_200_OK:
+            await aset_cached_response(
+                cache_key, {"etag": response["ETag"], "data": response.data}
+            )
+
+        return response
+
+
+@inherit_swagger_schema
+class AsyncUpdateCompanyView(AsyncViewMixin, UpdateCompanyView):
+    """
+    Async version of `UpdateCompanyView`.
+
+    The update is a single autocommitted statement, so the owner's cache is
+    invalidated right after it instead of on commit.
+    """
+
+    async def patch(self, request, *args, **kwargs):
+        try:
+            serializer = self.validate_body(request)
+        except ValidationError:
+            # Permission errors take precedence over request body errors
+            await self.aget_object()
+            raise
+
+        self.etag = None
+        await self.aperform_update(serializer)
+
+        return self.get_success_response()
+
+    async def aget_object(self):
+        """
+        Async version of `get_object`.
+        """
+        try:
+            company = await Company.objects.aget(id=self.kwargs["pk"])
+        except Company.DoesNotExist:
+            company = None
+
+        return self.check_object(company)
+
+    async def aperform_update(self, serializer):
+        """
+        Async version of `perform_update`.
+        """
+        companies, versions = self.get_update_queryset()
+        updated = await companies.aupdate(
+            **serializer.validated_data, version=F("version") + 1
+        )
+        if not updated:
+            # Raises 404 or 403, otherwise only the version did not match
+            await self.aget_object()
+            raise PreconditionFailed()
+
+        self.set_updated_etag(versions)
+        await ainvalidate_owner_cache(self.request.user.id)
+
+
+async def aiterate(queryset, chunk_size):
+    """
+    Iterate over a queryset with a server-side cursor from async code, one
+    chunk of rows per call into the worker thread.
+
+    Unlike `QuerySet.aiterator`, this works for `values_list()` querysets,
+    whose query Django 5.1 would run on the event loop.
+    """
+    rows = queryset.iterator(chunk_size=chunk_size)
+    fetch_chunk = sync_to_async(lambda: list(islice(rows, chunk_size)))
+    while chunk := await fetch_chunk():
+        for row in chunk:
+            yield row
+
+
+@inherit_swagger_schema
+class AsyncExportUserCompaniesView(AsyncViewMixin, ExportUserCompaniesView):
+    """
+    Async version of `ExportUserCompaniesView`.
+
+    The body is an async iterator fetching the rows chunk by chunk, as an
+    ASGI server reads a synchronous stream into memory before sending it.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        rows = aiterate(self.get_export_queryset(request), self.chunk_size)
+        return self.get_export_response(
+            request.accepted_renderer.astream(rows, CompanyListSerializer.Meta.fields)
+        )
+
+
+# The async views, by the URL name of the view they replace
+ASYNC_VIEWS = {
+    "create_company": AsyncCreateCompanyView,
+    "export_companies": AsyncExportUserCompaniesView,
+    "list_user_companies": AsyncListUserCompaniesView,
+    "retrieve_user_company": AsyncRetrieveUserCompanyView,
+    "update_company": AsyncUpdateCompanyView,
+}
@@ -0,0 +1,158 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from company_app.routers import apin_to_primary, pin_to_primary
+
+
+def get_version_key(owner_id):
+    """
+    Return the cache key holding the version counter of an owner.
+    """
+    return f"company:owner:{owner_id}:version"
+
+
+def get_owner_version(owner_id):
+    """
+    Return the current cache version of an owner's companies.
+
+    A missing counter is seeded with the current time in nanoseconds rather than
+    a small integer, so a counter evicted from a bounded cache never comes back
+    with a value that older entries were stored under.
+    """
+    key = get_version_key(owner_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_owner_version(owner_id):
+    """
+    Move an owner to a new cache version, orphaning all of their entries.
+    """
+    key = get_version_key(owner_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_owner_cache(owner_id):
+    """
+    Invalidate an owner's cached responses once the current transaction commits.
+
+    Bumping after the commit guarantees that a response built from the old rows
+    can only ever be stored under the old version. The owner's reads are also
+    pinned to the primary database for a while, so the next response isn't
+    built from a replica that hasn't caught up with the write yet.
+    """
+
+    def invalidate():
+        bump_owner_version(owner_id)
+        pin_to_primary(owner_id)
+
+    transaction.on_commit(invalidate)
+
+
+def make_cache_key(owner_id, kind, **params):
+    """
+    Build a versioned cache key for one of an owner's responses.
+
+    Args:
+        owner_id (int): The id of the user owning the companies.
+        kind (str): The kind of response, e.g. 'list' or 'detail'.
+        **params: The request parameters the response depends on.
+
+    Returns:
+        str: The cache key.
+    """
+    return format_cache_key(owner_id, kind, get_owner_version(owner_id), params)
+
+
+def format_cache_key(owner_id, kind, version, params):
+    """
+    Build the cache key of a response from the owner's cache version.
+    """
+    raw = "&".join(f"{name}={params[name]}" for name in sorted(params))
+    digest = hashlib.md5(raw.encode("utf-8"), usedforsecurity=False).hexdigest()
+    return f"company:{kind}:{owner_id}:{version}:{digest}"
+
+
+def get_cached_response(key):
+    """
+    Return the cached response data for the key, or None on a miss.
+    """
+    return cache.get(key)
+
+
+def set_cached_response(key, data):
+    """
+    Store response data under the key for COMPANY_CACHE_TIMEOUT seconds.
+    """
+    cache.set(key, data, timeout=settings.COMPANY_CACHE_TIMEOUT)
+
+
+# Async counterparts for the async views, using the cache's async API so
+# the event loop is never blocked by a network cache backend
+
+
+async def aget_owner_version(owner_id):
+    """
+    Async version of `get_owner_version`.
+    """
+    key = get_version_key(owner_id)
+    version = await cache.aget(key)
+    if version is None:
+        version = time.time_ns()
+        if not await cache.aadd(key, version, timeout=None):
+            version = await cache.aget(key, version)
+    return version
+
+
+async def abump_owner_version(owner_id):
+    """
+    Async version of `bump_owner_version`.
+    """
+    key = get_version_key(owner_id)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, time.time_ns(), timeout=None)
+
+
+async def ainvalidate_owner_cache(owner_id):
+    """
+    Async version of `invalidate_owner_cache`.
+
+    Async views write in autocommit mode, so there is no transaction to wait
+    for and the owner is invalidated right away.
+    """
+    await abump_owner_version(owner_id)
+    await apin_to_primary(owner_id)
+
+
+async def amake_cache_key(owner_id, kind, **params):
+    """
+    Async version of `make_cache_key`.
+    """
+    return format_cache_key(owner_id, kind, await aget_owner_version(owner_id), params)
+
+
+async def aget_cached_response(key):
+    """
+    Async version of `get_cached_response`.
+    """
+    return await cache.aget(key)
+
+
+async def aset_cached_response(key, data):
+    """
+    Async version of `set_cached_response`.
+    """
+    await cache.aset(key, data, timeout=settings.COMPANY_CACHE_TIMEOUT)
@@ -0,0 +1,109 @@
+import hashlib
+
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+
+class PreconditionFailed(APIException):
+    """
+    Raised when the If-Match header of a write no longer matches the resource.
+    """
+
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = {
+        "error": "The company was modified by another request. Fetch it again and retry."
+    }
+    default_code = "precondition_failed"
+
+
+def get_company_etag(company):
+    """
+    Return the strong ETag of a single company, derived from its row version.
+    """
+    return quote_etag(f"{company.id}-{company.version}")
+
+
+def get_list_etag(envelope, companies, fields):
+    """
+    Return the strong ETag of a page of companies.
+
+    The tag is derived from the page envelope (count and links) and the
+    (id, version) pairs of the rows on the page, so it can be computed before,
+    and without, serializing the rows.
+
+    Args:
+        envelope (dict): The paginated response without its results.
+        companies (list): The `values()` rows of the companies on the page,
+                          in response order, with their id and version.
+        fields (list): The serialized field names.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    parts = [f"{name}={envelope[name]}" for name in sorted(envelope)]
+    parts.append(",".join(fields))
+    parts.extend(f"{company['id']}-{company['version']}" for company in companies)
+    digest = hashlib.md5("\n".join(parts).encode("utf-8"), usedforsecurity=False)
+    return quote_etag(digest.hexdigest())
+
+
+def strip_weak(etag):
+    """
+    Return the opaque part of an ETag, ignoring a weak validator prefix.
+    """
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def if_none_match(request, etag):
+    """
+    Return True if the If-None-Match header of the request matches the ETag.
+
+    Uses the weak comparison required for If-None-Match, so compressed
+    variants that carry a weak form of the same tag still match.
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    etags = [strip_weak(tag) for tag in parse_etags(header)]
+    return "*" in etags or strip_weak(etag) in etags
+
+
+def get_if_match_versions(request, pk):
+    """
+    Return the company versions listed in the If-Match header of the request.
+
+    Tags of other companies never match. Weak tags are accepted although
+    If-Match calls for the strong comparison: the only source of weak company
+    tags is response compression, and the version identifies the row exactly.
+
+    Args:
+        request (Request): The HTTP request object.
+        pk (int): The id of the company being written.
+
+    Returns:
+        list: The matching versions, or None if the write is unconditional
+              (no If-Match header, or `If-Match: *`).
+    """
+    header = request.headers.get("If-Match")
+    if not header:
+        return None
+
+    etags = parse_etags(header)
+    if "*" in etags:
+        return None
+
+    prefix = f'"{pk}-'
+    versions = []
+    for etag in map(strip_weak, etags):
+        if etag.startswith(prefix) and etag[len(prefix) : -1].isdigit():
+            versions.append(int(etag[len(prefix) : -1]))
+    return versions
+
+
+def not_modified(etag):
+    """
+    Return an empty 304 response carrying the ETag.
+    """
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,210 @@
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+# The request header carrying the client's idempotency key
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# The longest accepted idempotency key, e.g. a UUID fits with plenty of room
+MAX_KEY_LENGTH = 255
+
+# Seconds between two checks while another request holds the same key
+POLL_INTERVAL = 0.05
+
+
+class IdempotencyConflict(APIException):
+    """
+    Raised when a request with the same Idempotency-Key is still running.
+    """
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = {
+        "error": "A request with this Idempotency-Key is still being processed. Retry later."
+    }
+    default_code = "idempotency_conflict"
+
+
+class IdempotencyKeyReused(APIException):
+    """
+    Raised when an Idempotency-Key is sent again with a different request body.
+    """
+
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = {
+        "error": "This Idempotency-Key was already used with a different request body."
+    }
+    default_code = "idempotency_key_reused"
+
+
+class IdempotentRequest:
+    """
+    A request carrying an Idempotency-Key, whose first response is stored in
+    the cache for IDEMPOTENCY_KEY_TTL seconds and replayed to its retries.
+
+    Keys are scoped to the user, and while a request holds a key other
+    requests with the same key wait for its response, so only one of them
+    ever runs. A crashed request keeps the key for IDEMPOTENCY_LOCK_TIMEOUT
+    seconds at most.
+
+    Attributes:
+        response_key (str): Cache key of the stored response.
+        lock_key (str): Cache key held while the request is processed.
+        fingerprint (str): Hash of the request body, a retry must match it.
+        token (str): Identifies this request as the holder of the lock.
+    """
+
+    def __init__(self, request, key):
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        prefix = f"idempotency:{request.user.id}:{digest}"
+        self.response_key = f"{prefix}:response"
+        self.lock_key = f"{prefix}:lock"
+        self.fingerprint = hashlib.sha256(
+            json.dumps(request.data, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        self.token = uuid.uuid4().hex
+
+    @classmethod
+    def from_request(cls, request):
+        """
+        Return the IdempotentRequest of a request, or None without the header.
+
+        Raises:
+            ValidationError: If the key is empty or too long.
+        """
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return None
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValidationError(
+                {
+                    "error": f"{IDEMPOTENCY_HEADER} must be between 1 and {MAX_KEY_LENGTH} characters."
+                }
+            )
+
+        return cls(request, key)
+
+    def replay(self, stored):
+        """
+        Build the response of a retry from the stored response.
+
+        Raises:
+            IdempotencyKeyReused: If the request body differs from the first one.
+        """
+        if stored["fingerprint"] != self.fingerprint:
+            raise IdempotencyKeyReused()
+
+        response = Response(stored["data"], status=stored["status"])
+        response["Idempotent-Replayed"] = "true"
+        return response
+
+    def get_stored(self, response):
+        return {
+            "fingerprint": self.fingerprint,
+            "status": response.status_code,
+            "data": response.data,
+        }
+
+    def begin(self):
+        """
+        Wait until this request holds the key or the first response is stored.
+
+        Returns:
+            Response: The replayed response, or None if this request has to be
+                      processed and `finish` called with its response.
+
+        Raises:
+            IdempotencyConflict: If the key stays held for IDEMPOTENCY_WAIT_SECONDS.
+            IdempotencyKeyReused: If the request body differs from the first one.
+        """
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            stored = cache.get(self.response_key)
+            if stored is not None:
+                return self.replay(stored)
+
+            if cache.add(
+                self.lock_key, self.token, timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT
+            ):
+                # The holder may have stored its response and released the key
+                # between the two calls
+                stored = cache.get(self.response_key)
+                if stored is None:
+                    return None
+                self.release()
+                return self.replay(stored)
+
+            if time.monotonic() >= deadline:
+                raise IdempotencyConflict()
+            time.sleep(POLL_INTERVAL)
+
+    def finish(self, response):
+        """
+        Store the response for the retries and release the key.
+
+        Server errors and requests that failed without a response are not
+        stored, so a retry processes the request again.
+        """
+        try:
+            if response is not None and response.status_code < 500:
+                cache.set(
+                    self.response_key,
+                    self.get_stored(response),
+                    timeout=settings.IDEMPOTENCY_KEY_TTL,
+                )
+        finally:
+            self.release()
+
+    def release(self):
+        # Only release the key if it hasn't expired and been taken over since
+        if cache.get(self.lock_key) == self.token:
+            cache.delete(self.lock_key)
+
+    async def abegin(self):
+        """
+        Async version of `begin`.
+        """
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            stored = await cache.aget(self.response_key)
+            if stored is not None:
+                return self.replay(stored)
+
+            if await cache.aadd(
+                self.lock_key, self.token, timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT
+            ):
+                stored = await cache.aget(self.response_key)
+                if stored is None:
+                    return None
+                await self.arelease()
+                return self.replay(stored)
+
+            if time.monotonic() >= deadline:
+                raise IdempotencyConflict()
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def afinish(self, response):
+        """
+        Async version of `finish`.
+        """
+        try:
+            if response is not None and response.status_code < 500:
+                await cache.aset(
+                    self.response_key,
+                    self.get_stored(response),
+                    timeout=settings.IDEMPOTENCY_KEY_TTL,
+                )
+        finally:
+            await self.arelease()
+
+    async def arelease(self):
+        if await cache.aget(self.lock_key) == self.token:
+            await cache.adelete(self.lock_key)
@@ -0,0 +1,416 @@
+import asyncio
+import io
+import json
+import statistics
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import include, path, reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from company.models import Company
+from company.views import MAX_COMPANIES_PER_USER
+from company_app.authentication import add_user_claims
+
+# Password of every seeded user
+PASSWORD = "benchmark-password"
+
+# The compared setups: (name, server interface, URLconf of the company API)
+MODES = (
+    ("wsgi", "wsgi", "company.urls"),
+    ("asgi sync views", "asgi", "company.urls"),
+    ("asgi async views", "asgi", "company.async_urls"),
+)
+
+
+def make_urlconf(company_urls):
+    """
+    Build a root URLconf serving the company API from the given module.
+    """
+    urlconf = types.ModuleType(f"benchmark_urls_{company_urls.replace('.', '_')}")
+    urlconf.urlpatterns = [path("api/company/", include(company_urls))]
+    return urlconf
+
+
+class Command(BaseCommand):
+    """
+    Compares the throughput of concurrent clients under ASGI and WSGI.
+
+    Each endpoint is driven by `--clients` concurrent clients sending
+    `--requests` requests each, through three setups:
+        wsgi: The synchronous views behind Django's WSGI handler, one thread
+              per client, as with a threaded WSGI server.
+        asgi sync views: The synchronous views behind Django's ASGI handler,
+                         which runs each of them in a worker thread.
+        asgi async views: The native async views of `company.async_views`.
+
+    The handlers are called in-process, without a network server, so only
+    Django's side of the request is measured. The command creates a
+    throwaway test database and disables the response cache, so every
+    request reaches the database.
+    """
+
+    help = "Compare concurrent throughput of the API under ASGI and WSGI."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=16,
+            help="Number of concurrent clients.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=25,
+            help="Number of timed requests per client and endpoint.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=2,
+            help="Number of untimed requests per client and endpoint.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Path of the JSON results file.",
+        )
+
+    def seed(self):
+        """
+        Create one owner with companies per client, and enough owners
+        without companies for every create request.
+        """
+        user_model = get_user_model()
+        password = make_password(PASSWORD)
+        per_client = self.requests + self.warmup
+
+        self.owners = user_model.objects.bulk_create(
+            user_model(username=f"owner{i}", password=password)
+            for i in range(self.clients)
+        )
+        self.fresh_users = user_model.objects.bulk_create(
+            user_model(username=f"fresh{i}", password=password)
+            for i in range(self.clients * per_client * len(MODES))
+        )
+        Company.objects.bulk_create(
+            Company(
+                company_name=f"Company {i}-{j}",
+                description=f"Company {j} of owner {i}, seeded for benchmarks.",
+                number_of_employees=j,
+                owner=owner,
+            )
+            for i, owner in enumerate(self.owners)
+            for j in range(MAX_COMPANIES_PER_USER)
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        self.company_ids = {
+            owner.id: Company.objects.filter(owner=owner)
+            .order_by("id")
+            .values_list("id", flat=True)
+            .first()
+            for owner in self.owners
+        }
+
+    def get_auth(self, user):
+        """
+        Return the Authorization header value of a fresh access token.
+        """
+        refresh = RefreshToken.for_user(user)
+        add_user_claims(refresh, user)
+        return f"Bearer {refresh.access_token}"
+
+    def get_endpoints(self):
+        """
+        Declare the benchmarked endpoints.
+
+        Every endpoint is a dict with its name, expected status and a
+        `request` callable building the (method, path, body, authorization)
+        of a client's request. Create requests draw a new user each time, as
+        every user may only own MAX_COMPANIES_PER_USER companies.
+        """
+        auth = {owner.id: self.get_auth(owner) for owner in self.owners}
+        fresh = iter(self.fresh_users)
+        fresh_lock = threading.Lock()
+
+        def owner_request(method, build_path, body=None):
+            def request(client, i):
+                owner = self.owners[client]
+                return method, build_path(owner), body, auth[owner.id]
+
+            return request
+
+        def create(client, i):
+            with fresh_lock:
+                user = next(fresh)
+            body = {
+                "company_name": f"New company {i}",
+                "description": "Created by the benchmark.",
+                "number_of_employees": i,
+            }
+            return "POST", reverse("create_company"), body, self.get_auth(user)
+
+        return [
+            {
+                "name": "list_user_companies",
+                "request": owner_request(
+                    "GET", lambda owner: reverse("list_user_companies")
+                ),
+                "status": 200,
+            },
+            {
+                "name": "retrieve_user_company",
+                "request": owner_request(
+                    "GET",
+                    lambda owner: reverse(
+                        "retrieve_user_company", args=[self.company_ids[owner.id]]
+                    ),
+                ),
+                "status": 200,
+            },
+            {
+                "name": "update_company",
+                "request": owner_request(
+                    "PATCH",
+                    lambda owner: reverse(
+                        "update_company", args=[self.company_ids[owner.id]]
+                    ),
+                    {"number_of_employees": 42},
+                ),
+                "status": 200,
+            },
+            {"name": "create_company", "request": create, "status": 201},
+        ]
+
+    def call_wsgi(self, handler, method, full_path, body, authorization):
+        """
+        Send one request through the WSGI handler.
+
+        Returns:
+            int: The response status code.
+        """
+        path_info, _, query = full_path.partition("?")
+        data = json.dumps(body).encode() if body is not None else b""
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path_info,
+            "QUERY_STRING": query,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(data)),
+            "HTTP_AUTHORIZATION": authorization,
+            "wsgi.input": io.BytesIO(data),
+            "wsgi.errors": sys.stderr,
+        }
+        setup_testing_defaults(environ)
+
+        statuses = []
+        result = handler(environ, lambda status, headers: statuses.append(status))
+        try:
+            b"".join(result)
+        finally:
+            # Fires request_finished, which closes the database connection
+            result.close()
+        return int(statuses[0].split()[0])
+
+    async def call_asgi(self, handler, method, full_path, body, authorization):
+        """
+        Send one request through the ASGI handler.
+
+        Returns:
+            int: The response status code.
+        """
+        path_info, _, query = full_path.partition("?")
+        data = json.dumps(body).encode() if body is not None else b""
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path_info,
+            "raw_path": path_info.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [
+                (b"host", b"testserver"),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(data)).encode()),
+                (b"authorization", authorization.encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+        messages = [{"type": "http.request", "body": data, "more_body": False}]
+        disconnected = asyncio.Event()
+        statuses = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # The client stays connected until the response is complete
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        await handler(scope, receive, send)
+        disconnected.set()
+        return statuses[0]
+
+    def run_wsgi(self, endpoint, handler):
+        """
+        Drive an endpoint with one thread per client.
+
+        Returns:
+            tuple: The latencies of the timed requests and the wall time.
+        """
+
+        def client(index):
+            timings = []
+            for i in range(self.warmup + self.requests):
+                request = endpoint["request"](index, i)
+                start = time.perf_counter()
+                status = self.call_wsgi(handler, *request)
+                elapsed = time.perf_counter() - start
+                self.check_status(endpoint, status)
+                if i >= self.warmup:
+                    timings.append(elapsed)
+            return timings
+
+        with ThreadPoolExecutor(max_workers=self.clients) as executor:
+            start = time.perf_counter()
+            results = list(executor.map(client, range(self.clients)))
+            wall_time = time.perf_counter() - start
+        return [timing for timings in results for timing in timings], wall_time
+
+    def run_asgi(self, endpoint, handler):
+        """
+        Drive an endpoint with one task per client on an event loop.
+
+        Returns:
+            tuple: The latencies of the timed requests and the wall time.
+        """
+
+        async def client(index):
+            timings = []
+            for i in range(self.warmup + self.requests):
+                request = endpoint["request"](index, i)
+                start = time.perf_counter()
+                status = await self.call_asgi(handler, *request)
+                elapsed = time.perf_counter() - start
+                self.check_status(endpoint, status)
+                if i >= self.warmup:
+                    timings.append(elapsed)
+            return timings
+
+        async def main():
+            start = time.perf_counter()
+            results = await asyncio.gather(*map(client, range(self.clients)))
+            return results, time.perf_counter() - start
+
+        results, wall_time = asyncio.run(main())
+        return [timing for timings in results for timing in timings], wall_time
+
+    def check_status(self, endpoint, status):
+        if status != endpoint["status"]:
+            raise CommandError(
+                f"{endpoint['name']} returned {status}, expected {endpoint['status']}."
+            )
+
+    def summarize(self, timings, wall_time):
+        """
+        Return the throughput and latency percentiles of a run.
+
+        The warmup requests run concurrently with the timed ones, so the
+        throughput counts all requests over the whole run.
+        """
+        total = self.clients * (self.requests + self.warmup)
+        quantiles = statistics.quantiles(timings, n=100, method="inclusive")
+        return {
+            "requests": total,
+            "requests_per_second": round(total / wall_time, 1),
+            "p50_ms": round(quantiles[49] * 1000, 3),
+            "p95_ms": round(quantiles[94] * 1000, 3),
+            "p99_ms": round(quantiles[98] * 1000, 3),
+        }
+
+    def handle(self, *args, **options):
+        self.clients = options["clients"]
+        self.requests = options["requests"]
+        self.warmup = options["warmup"]
+        if self.clients < 1 or self.requests < 2:
+            raise CommandError("At least 1 client and 2 requests are needed.")
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        # Every request has to reach the database, not the response cache
+        no_cache = override_settings(
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+            }
+        )
+        no_cache.enable()
+        # The client threads are discarded after every run, so their
+        # persistent connections would be left open until the database is
+        # dropped, close every connection at the end of its request instead
+        for alias in connections:
+            connections[alias].settings_dict["CONN_MAX_AGE"] = 0
+        try:
+            self.seed()
+            endpoints = self.get_endpoints()
+            results = {}
+            for mode, interface, company_urls in MODES:
+                with override_settings(ROOT_URLCONF=make_urlconf(company_urls)):
+                    for endpoint in endpoints:
+                        if interface == "wsgi":
+                            run = self.run_wsgi(endpoint, WSGIHandler())
+                        else:
+                            run = self.run_asgi(endpoint, ASGIHandler())
+                        result = self.summarize(*run)
+                        results.setdefault(endpoint["name"], {})[mode] = result
+                        self.report(endpoint["name"], mode, result)
+        finally:
+            no_cache.disable()
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(
+                    {
+                        "settings": {
+                            "clients": self.clients,
+                            "requests": self.requests,
+                            "warmup": self.warmup,
+                        },
+                        "endpoints": results,
+                    },
+                    output,
+                    indent=2,
+                )
+
+    def report(self, name, mode, result):
+        self.stdout.write(
+            f"{name:<24} {mode:<18} {result['requests_per_second']:>9.1f} req/s  "
+            f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+            f"p99 {result['p99_ms']:>8.2f} ms"
+        )
@@ -0,0 +1,485 @@
+import json
+import platform
+import re
+import statistics
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from company.models import Company
+from company.views import MAX_COMPANIES_PER_USER
+from company_app.authentication import add_user_claims
+
+# Password of every seeded user
+PASSWORD = "benchmark-password"
+
+# Latency percentiles reported per endpoint
+PERCENTILES = (50, 90, 95, 99)
+
+# Transaction control statements, which do not count against the budgets
+TRANSACTION_CONTROL = re.compile(
+    r"^\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE SAVEPOINT)\b", re.IGNORECASE
+)
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks every route of `company/urls.py` and `company_app/urls.py`
+    through the Django test client and enforces a SQL query budget per
+    endpoint.
+
+    The command creates a throwaway test database, seeds it with
+    `--users` owners of `--companies` companies each and sends every
+    endpoint `--iterations` requests after `--warmup` untimed ones. The
+    cache is cleared before every request, so the numbers describe the
+    database path rather than cache hits.
+
+    Latency percentiles and query counts are printed, and written as JSON
+    with `--output` so runs can be compared between commits. The command
+    fails if any endpoint returns an unexpected status or issues more
+    queries than its budget.
+    """
+
+    help = "Benchmark the API endpoints and enforce their query budgets."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=200,
+            help="Number of seeded company owners.",
+        )
+        parser.add_argument(
+            "--companies",
+            type=int,
+            default=MAX_COMPANIES_PER_USER,
+            help="Number of companies seeded per owner.",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=30,
+            help="Number of timed requests per endpoint.",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=3,
+            help="Number of untimed requests per endpoint before timing.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Path of the JSON results file.",
+        )
+
+    def seed(self, users, companies):
+        """
+        Create the owners, their companies and a pool of owners without
+        companies for the create endpoints.
+        """
+        user_model = get_user_model()
+        password = make_password(PASSWORD)
+
+        requests = self.iterations + self.warmup
+        owners = user_model.objects.bulk_create(
+            user_model(
+                username=f"owner{i}", email=f"owner{i}@example.com", password=password
+            )
+            for i in range(users)
+        )
+        self.fresh_users = user_model.objects.bulk_create(
+            user_model(username=f"fresh{i}", password=password)
+            for i in range(2 * requests)
+        )
+        Company.objects.bulk_create(
+            (
+                Company(
+                    company_name=f"Company {i}-{j}",
+                    description=f"Company {j} of owner {i}, seeded for benchmarks.",
+                    number_of_employees=(i * j) % 1000,
+                    owner=owner,
+                )
+                for i, owner in enumerate(owners)
+                for j in range(companies)
+            ),
+            batch_size=1000,
+        )
+        self.admin = user_model.objects.create_superuser(
+            "benchmark-admin", "admin@example.com", PASSWORD
+        )
+
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        self.owner = owners[0]
+        self.company_ids = list(
+            self.owner.companies.order_by("id").values_list("id", flat=True)
+        )
+
+    def get_auth(self, user):
+        """
+        Return the Authorization header of a freshly issued access token.
+        """
+        refresh = RefreshToken.for_user(user)
+        add_user_claims(refresh, user)
+        return {"HTTP_AUTHORIZATION": f"Bearer {refresh.access_token}"}
+
+    def get_endpoints(self):
+        """
+        Declare the benchmarked endpoints.
+
+        Every endpoint is a dict with its name, expected status, query
+        budget and a `request` callable building the (method, path, body,
+        extra) of the i-th request. `admin` endpoints use a session of a
+        superuser instead of a token.
+
+        The budgets are the query counts of the current implementation.
+        The create endpoints include loading the user, since every request
+        comes from a user the authentication cache has not seen yet.
+        """
+        owner_auth = self.get_auth(self.owner)
+        pk = self.company_ids[0]
+        fresh = iter(self.fresh_users)
+        refresh_tokens = [str(RefreshToken.for_user(self.owner))]
+
+        def create(i):
+            user = next(fresh)
+            body = {
+                "company_name": f"New company {i}",
+                "description": "Created by the benchmark.",
+                "number_of_employees": i,
+            }
+            return "post", reverse("create_company"), body, self.get_auth(user)
+
+        def bulk_create(i):
+            user = next(fresh)
+            body = [
+                {
+                    "company_name": f"Bulk company {i}-{j}",
+                    "description": "Created by the benchmark.",
+                    "number_of_employees": j,
+                }
+                for j in range(MAX_COMPANIES_PER_USER)
+            ]
+            return "post", reverse("bulk_create_companies"), body, self.get_auth(user)
+
+        def refresh(i):
+            # Rotation revokes the previous token, so always send the latest
+            return (
+                "post",
+                reverse("token_refresh"),
+                {"refresh": refresh_tokens[-1]},
+                {},
+            )
+
+        def keep_refresh_token(response):
+            refresh_tokens.append(response.json()["refresh"])
+
+        def get(path, extra=owner_auth):
+            return lambda i: ("get", path, None, extra)
+
+        list_url = reverse("list_user_companies")
+        changelist_url = reverse("admin:company_company_changelist")
+        return [
+            {
+                "name": "token_obtain_pair",
+                "request": lambda i: (
+                    "post",
+                    reverse("token_obtain_pair"),
+                    {"username_or_email": self.owner.username, "password": PASSWORD},
+                    {},
+                ),
+                "status": 200,
+                "budget": 1,
+            },
+            {
+                "name": "token_refresh",
+                "request": refresh,
+                "after": keep_refresh_token,
+                "status": 200,
+                "budget": 1,
+            },
+            {"name": "create_company", "request": create, "status": 201, "budget": 4},
+            {
+                "name": "bulk_create_companies",
+                "request": bulk_create,
+                "status": 201,
+                "budget": 4,
+            },
+            {
+                "name": "list_user_companies",
+                "request": get(list_url),
+                "status": 200,
+                "budget": 2,
+            },
+            {
+                "name": "list_user_companies (cursor)",
+                "request": get(f"{list_url}?pagination=cursor"),
+                "status": 200,
+                "budget": 1,
+            },
+            {
+                "name": "list_user_companies (search)",
+                "request": get(f"{list_url}?search=company"),
+                "status": 200,
+                "budget": 2,
+            },
+            {
+                "name": "export_companies",
+                "request": get(reverse("export_companies")),
+                "status": 200,
+                "budget": 1,
+            },
+            {
+                "name": "company_stats",
+                "request": get(reverse("company_stats")),
+                "status": 200,
+                "budget": 1,
+            },
+            {
+                "name": "retrieve_user_company",
+                "request": get(reverse("retrieve_user_company", args=[pk])),
+                "status": 200,
+                "budget": 1,
+            },
+            {
+                "name": "update_company",
+                "request": lambda i: (
+                    "patch",
+                    reverse("update_company", args=[pk]),
+                    {"number_of_employees": i},
+                    owner_auth,
+                ),
+                "status": 200,
+                "budget": 1,
+            },
+            {
+                "name": "bulk_update_companies",
+                "request": lambda i: (
+                    "patch",
+                    reverse("bulk_update_companies"),
+                    [
+                        {"id": company_id, "number_of_employees": i}
+                        for company_id in self.company_ids
+                    ],
+                    owner_auth,
+                ),
+                "status": 200,
+                "budget": 2,
+            },
+            {
+                "name": "schema-swagger-ui",
+                "request": get(reverse("schema-swagger-ui"), {}),
+                "status": 200,
+                "budget": 0,
+            },
+            {
+                "name": "schema-swagger-ui (openapi)",
+                "request": get(f"{reverse('schema-swagger-ui')}?format=openapi", {}),
+                "status": 200,
+                "budget": 0,
+            },
+            {
+                "name": "admin:index",
+                "request": get(reverse("admin:index"), {}),
+                "admin": True,
+                "status": 200,
+                "budget": 3,
+            },
+            {
+                "name": "admin:company_company_changelist",
+                "request": get(changelist_url, {}),
+                "admin": True,
+                "status": 200,
+                "budget": 5,
+            },
+            {
+                "name": "admin:company_company_changelist (owner filter)",
+                "request": get(
+                    f"{changelist_url}?owner__id__exact={self.owner.id}&q=company",
+                    {},
+                ),
+                "admin": True,
+                "status": 200,
+                "budget": 5,
+            },
+            {
+                "name": "admin:company_company_change",
+                "request": get(reverse("admin:company_company_change", args=[pk]), {}),
+                "admin": True,
+                "status": 200,
+                "budget": 4,
+            },
+            {
+                "name": "admin:autocomplete",
+                "request": get(
+                    f"{reverse('admin:autocomplete')}?app_label=company"
+                    "&model_name=company&field_name=owner&term=owner1",
+                    {},
+                ),
+                "admin": True,
+                "status": 200,
+                "budget": 4,
+            },
+            {
+                "name": "django-admindocs-docroot",
+                "request": get(reverse("django-admindocs-docroot"), {}),
+                "admin": True,
+                "status": 200,
+                "budget": 2,
+            },
+            {
+                "name": "metrics",
+                "request": get(
+                    reverse("metrics"),
+                    {"HTTP_AUTHORIZATION": f"Bearer {settings.METRICS_TOKEN}"},
+                ),
+                "status": 200,
+                "budget": 0,
+            },
+        ]
+
+    def run_endpoint(self, endpoint):
+        """
+        Send the warmup and timed requests of an endpoint.
+
+        Returns:
+            dict: The latency and query statistics of the timed requests.
+        """
+        client = Client()
+        if endpoint.get("admin"):
+            client.force_login(self.admin)
+
+        timings, query_counts, errors = [], [], []
+        for i in range(self.warmup + self.iterations):
+            method, path, body, extra = endpoint["request"](i)
+            kwargs = dict(extra)
+            if body is not None:
+                kwargs.update(data=json.dumps(body), content_type="application/json")
+
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = getattr(client, method)(path, **kwargs)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                elapsed = time.perf_counter() - start
+
+            if response.status_code != endpoint["status"]:
+                errors.append(f"request {i} returned {response.status_code}")
+                break
+            if "after" in endpoint:
+                endpoint["after"](response)
+            if i >= self.warmup:
+                timings.append(elapsed * 1000)
+                query_counts.append(
+                    sum(
+                        not TRANSACTION_CONTROL.match(query["sql"])
+                        for query in queries.captured_queries
+                    )
+                )
+
+        result = {"errors": errors, "budget": endpoint["budget"]}
+        if timings:
+            quantiles = statistics.quantiles(timings, n=100, method="inclusive")
+            result.update(
+                {
+                    "requests": len(timings),
+                    "mean_ms": round(statistics.fmean(timings), 3),
+                    "min_ms": round(min(timings), 3),
+                    "max_ms": round(max(timings), 3),
+                    **{
+                        f"p{percentile}_ms": round(quantiles[percentile - 1], 3)
+                        for percentile in PERCENTILES
+                    },
+                    "queries_min": min(query_counts),
+                    "queries_max": max(query_counts),
+                }
+            )
+            if result["queries_max"] > endpoint["budget"]:
+                errors.append(
+                    f"issued {result['queries_max']} queries, "
+                    f"the budget is {endpoint['budget']}"
+                )
+        return result
+
+    def handle(self, *args, **options):
+        self.iterations = options["iterations"]
+        self.warmup = options["warmup"]
+        if self.iterations < 2:
+            raise CommandError("At least 2 iterations are needed for percentiles.")
+
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        # Measure with the metrics middleware enabled, as in production
+        metrics_settings = override_settings(
+            METRICS_TOKEN=settings.METRICS_TOKEN or "benchmark"
+        )
+        metrics_settings.enable()
+        try:
+            self.seed(options["users"], options["companies"])
+            results = {}
+            for endpoint in self.get_endpoints():
+                results[endpoint["name"]] = self.run_endpoint(endpoint)
+                self.report(endpoint["name"], results[endpoint["name"]])
+        finally:
+            metrics_settings.disable()
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(
+                    {
+                        "settings": {
+                            "users": options["users"],
+                            "companies": options["companies"],
+                            "iterations": self.iterations,
+                            "warmup": self.warmup,
+                        },
+                        "environment": {
+                            "python": platform.python_version(),
+                            "django": django.get_version(),
+                            "database": connection.vendor,
+                        },
+                        "endpoints": results,
+                    },
+                    output,
+                    indent=2,
+                )
+
+        failures = [name for name, result in results.items() if result["errors"]]
+        if failures:
+            raise CommandError(
+                f"{len(failures)} endpoints failed: {', '.join(failures)}."
+            )
+
+    def report(self, name, result):
+        if "requests" not in result:
+            self.stdout.write(self.style.ERROR(f"FAIL {name}: {result['errors'][0]}"))
+            return
+
+        line = (
+            f"{name:<50} p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+            f"p99 {result['p99_ms']:>8.2f} ms  queries {result['queries_max']}/{result['budget']}"
+        )
+        if result["errors"]:
+            self.stdout.write(self.style.ERROR(f"FAIL {line}: {result['errors'][0]}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"OK   {line}"))
@@ -0,0 +1,96 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from company.models import Company
+from company.renderers import FastJSONRenderer
+from company.serializers import CompanyListSerializer
+
+
+class Command(BaseCommand):
+    """
+    Micro-benchmark of the company list serialization, comparing the stock
+    path (ModelSerializer over model instances, rendered by JSONRenderer)
+    with the fast path (`serialize_rows` over `values()` rows, rendered by
+    FastJSONRenderer).
+
+    The rows are built in memory, so no database is needed and only the
+    serialization and rendering are measured. Both paths must produce the
+    same bytes, otherwise the command fails.
+    """
+
+    help = "Benchmark the fast serialization path of the company list."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="5,100,10000",
+            help="Comma separated page sizes to benchmark.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Number of timed runs per page size, the median is reported.",
+        )
+
+    def make_rows(self, size):
+        """
+        Build `values()` style rows with some non-ASCII and escaped text.
+        """
+        return [
+            {
+                "id": i,
+                "version": 1,
+                "company_name": f"Company {i} – Ünïcode",
+                "description": f'Line one\nLine "two"   of company {i}. ' * 5,
+                "number_of_employees": i * 7,
+            }
+            for i in range(1, size + 1)
+        ]
+
+    def render_stock(self, rows):
+        companies = [Company(**row) for row in rows]
+        results = CompanyListSerializer(companies, many=True).data
+        return JSONRenderer().render(self.envelope(results))
+
+    def render_fast(self, rows):
+        results = CompanyListSerializer.serialize_rows(rows)
+        return FastJSONRenderer().render(self.envelope(results))
+
+    def envelope(self, results):
+        return {
+            "count": len(results),
+            "next": "http://testserver/api/company/?page=2",
+            "previous": None,
+            "results": results,
+        }
+
+    def time(self, func, rows, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(rows)
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",")]
+
+        self.stdout.write(
+            f"{'rows':>8} {'stock ms':>10} {'fast ms':>10} {'speedup':>8}"
+        )
+        for size in sizes:
+            rows = self.make_rows(size)
+
+            if self.render_stock(rows) != self.render_fast(rows):
+                raise CommandError(f"The fast path output differs at {size} rows.")
+
+            stock = self.time(self.render_stock, rows, options["repeat"])
+            fast = self.time(self.render_fast, rows, options["repeat"])
+            self.stdout.write(
+                f"{size:>8} {stock * 1000:>10.3f} {fast * 1000:>10.3f} "
+                f"{stock / fast:>7.1f}x"
+            )
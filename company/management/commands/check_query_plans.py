@@ -0,0 +1,162 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Q
+
+from company.admin import CompanyAdmin
+from company.models import SEARCH_CONFIG, Company
+from company.views import ORDERING_FIELDS, UNINDEXED_ORDERING_FIELDS
+
+# Plan nodes that mean an access path is not covered by an index
+FORBIDDEN_NODES = re.compile(r"\b(Seq Scan|Sort)\b")
+
+# Ranking by relevance always sorts the matches, only the lookup must be indexed
+SEQ_SCAN = re.compile(r"\bSeq Scan\b")
+
+
+class Command(BaseCommand):
+    """
+    Runs EXPLAIN on the queries issued by the company views and the admin
+    search, and fails if any
+    of them falls back to a sequential scan or an explicit sort.
+
+    Sequential scans and sorts are disabled for the session while explaining,
+    so the planner only picks them when no usable index exists. This keeps the
+    check meaningful on small development databases, where a sequential scan
+    would otherwise always look cheaper. Relevance ranked searches and the
+    orderings in UNINDEXED_ORDERING_FIELDS are only checked for sequential
+    scans, since they need a sort by design. Their sorts are reported as
+    expected rather than passed silently.
+    """
+
+    help = "Verify that the company view queries are served by indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--owner-id",
+            type=int,
+            default=1,
+            help="Owner id used to build the queries (the rows need not exist).",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=5,
+            help="Page size used for the list queries.",
+        )
+
+    def get_queries(self, owner_id, page_size):
+        """
+        Build the querysets and raw statements the views execute.
+
+        Returns:
+            list: Tuples of (label, SQL string, params, forbidden plan nodes).
+        """
+        companies = Company.objects.filter(owner_id=owner_id)
+        queries = []
+
+        # List view, page number and cursor mode, in both directions
+        for field in ORDERING_FIELDS:
+            for prefix, lookup in (("", "gt"), ("-", "lt")):
+                ordered = companies.order_by(f"{prefix}{field}", f"{prefix}id")
+                queries.append((f"list ordering={prefix}{field}", ordered[:page_size]))
+
+                value = 0 if field == "number_of_employees" else ""
+                after_cursor = ordered.filter(
+                    Q(**{f"{field}__{lookup}": value})
+                    | Q(**{field: value, f"id__{lookup}": 1})
+                )
+                queries.append(
+                    (f"list cursor ordering={prefix}{field}", after_cursor[:page_size])
+                )
+
+        # Retrieve view
+        queries.append(("retrieve", Company.objects.filter(id=1, owner_id=owner_id)))
+
+        statements = []
+        for label, queryset in queries:
+            sql, params = queryset.query.sql_with_params()
+            # Unindexed orderings must still find the owner's rows by index
+            unindexed = any(
+                label.endswith(f"ordering={prefix}{field}")
+                for field in UNINDEXED_ORDERING_FIELDS
+                for prefix in ("", "-")
+            )
+            statements.append(
+                (label, sql, params, SEQ_SCAN if unindexed else FORBIDDEN_NODES)
+            )
+
+        # List view search, ranked by relevance
+        query = SearchQuery("tech", search_type="websearch", config=SEARCH_CONFIG)
+        searched = (
+            companies.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "id")[:page_size]
+        )
+        sql, params = searched.query.sql_with_params()
+        statements.append(("list search", sql, params, SEQ_SCAN))
+
+        # Admin search, the username lookup and the company filter it feeds
+        usernames = User.objects.filter(username__in=["owner"]).values_list(
+            "username", "id"
+        )
+        sql, params = usernames.query.sql_with_params()
+        statements.append(("admin search owner lookup", sql, params, SEQ_SCAN))
+
+        searched = Company.objects.filter(
+            CompanyAdmin.get_search_condition("tech", owner_id)
+        )
+        sql, params = searched.query.sql_with_params()
+        statements.append(("admin search", sql, params, SEQ_SCAN))
+
+        # Update view, the single conditional UPDATE
+        quote = connection.ops.quote_name
+        statements.append(
+            (
+                "update",
+                f"UPDATE {quote(Company._meta.db_table)} "
+                f"SET {quote('number_of_employees')} = %s "
+                f"WHERE {quote('id')} = %s AND {quote('owner_id')} = %s",
+                (1, 1, owner_id),
+                FORBIDDEN_NODES,
+            )
+        )
+        return statements
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Query plan checks require a PostgreSQL database.")
+
+        failures = []
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_sort = off")
+
+            for label, sql, params, forbidden in self.get_queries(
+                options["owner_id"], options["page_size"]
+            ):
+                cursor.execute(f"EXPLAIN {sql}", params)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+
+                if forbidden.search(plan):
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(f"FAIL {label}\n{plan}"))
+                elif FORBIDDEN_NODES.search(plan):
+                    # Accepted by design, but kept visible
+                    self.stdout.write(
+                        self.style.WARNING(f"SORT {label} (expected, not index-backed)")
+                    )
+                else:
+                    self.stdout.write(self.style.SUCCESS(f"OK   {label}"))
+
+            # Never keep anything from the session around
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(
+                f"{len(failures)} queries fall back to a sequential scan or a sort: "
+                f"{', '.join(failures)}."
+            )
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from drf_yasg.renderers import OpenAPIRenderer, SwaggerYAMLRenderer
+
+from company_app.swagger import get_schema_document
+
+# The spec renderers by the name of the format they render
+FORMATS = {"json": OpenAPIRenderer, "yaml": SwaggerYAMLRenderer}
+
+
+class Command(BaseCommand):
+    """
+    Writes the OpenAPI schema served at `/swagger/?format=openapi` to a file,
+    e.g. for an API gateway to load instead of fetching it from the API.
+
+    The schema is the same document the API serves from memory, including
+    its ETag.
+    """
+
+    help = "Export the OpenAPI schema of the API."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=sorted(FORMATS),
+            default="json",
+            help="Format of the schema document.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Path of the schema file, the schema is written to stdout if omitted.",
+        )
+
+    def handle(self, *args, **options):
+        content, etag = get_schema_document(FORMATS[options["format"]])
+
+        if not options["output"]:
+            self.stdout.write(content.decode())
+            return
+
+        with open(options["output"], "wb") as output:
+            output.write(content)
+        self.stderr.write(f"Wrote the schema to {options['output']}, ETag {etag}.")
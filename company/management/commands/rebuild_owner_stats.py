@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from company.models import Company, OwnerStats
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the per-owner company statistics from scratch, or verifies them
+    against a full aggregation of the companies with `--check`.
+
+    The rebuild holds a SHARE lock on the company table, so company writes
+    wait for it instead of being lost, while reads carry on.
+    """
+
+    help = "Rebuild or verify the per-owner company statistics."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only compare the statistics with the companies, exit with an error on drift.",
+        )
+
+    def get_expected(self):
+        """
+        Aggregate the companies per owner.
+
+        Returns:
+            dict: (company count, total employees) keyed by owner id.
+        """
+        rows = (
+            Company.objects.order_by()
+            .values("owner_id")
+            .annotate(count=Count("id"), total=Sum("number_of_employees"))
+            .values_list("owner_id", "count", "total")
+        )
+        return {owner_id: (count, total) for owner_id, count, total in rows.iterator()}
+
+    def verify(self):
+        expected = self.get_expected()
+        mismatches = []
+
+        for stats in OwnerStats.objects.iterator():
+            actual = (stats.company_count, stats.total_employees)
+            wanted = expected.pop(stats.owner_id, (0, 0))
+            if actual != wanted:
+                mismatches.append((stats.owner_id, actual, wanted))
+
+        # Owners with companies but no statistics at all
+        mismatches.extend(
+            (owner_id, None, wanted) for owner_id, wanted in expected.items()
+        )
+
+        for owner_id, actual, wanted in mismatches:
+            self.stdout.write(
+                self.style.ERROR(
+                    f"owner {owner_id}: stored {actual}, expected {wanted}"
+                )
+            )
+        if mismatches:
+            raise CommandError(
+                f"The statistics of {len(mismatches)} owners are out of date, "
+                "run the command without --check to rebuild them."
+            )
+        self.stdout.write(self.style.SUCCESS("The statistics are up to date."))
+
+    def rebuild(self):
+        table = connection.ops.quote_name(Company._meta.db_table)
+        stats_table = connection.ops.quote_name(OwnerStats._meta.db_table)
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {table} IN SHARE MODE")
+            OwnerStats.objects.all().delete()
+            cursor.execute(
+                f"INSERT INTO {stats_table} (owner_id, company_count, total_employees) "
+                f"SELECT owner_id, COUNT(*), SUM(number_of_employees) FROM {table} "
+                "GROUP BY owner_id"
+            )
+            rebuilt = cursor.rowcount
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt the statistics of {rebuilt} owners.")
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Owner statistics require a PostgreSQL database.")
+
+        if options["check"]:
+            self.verify()
+        else:
+            self.rebuild()
@@ -0,0 +1,67 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from company.outbox import send_pending_emails
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Background worker that drains the email outbox in batches.
+
+    By default the worker runs forever and sleeps for `--interval` seconds
+    whenever the outbox is empty. Use `--once` to drain what is currently due
+    and exit, e.g. from a cron job.
+
+    Errors, such as an unreachable database, are logged and the worker keeps
+    polling, so queued emails are delivered once the cause is resolved.
+    """
+
+    help = "Deliver queued emails from the outbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.EMAIL_OUTBOX_BATCH_SIZE,
+            help="Maximum number of emails sent over one connection.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+            help="Seconds to sleep when there is nothing to send.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the due emails once and exit.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                sent, failed = send_pending_emails(options["batch_size"])
+            except Exception as e:
+                if options["once"]:
+                    raise CommandError(f"Sending the outbox failed: {e}") from e
+                # Keep the worker alive, e.g. while the database restarts
+                logger.exception("Sending the outbox failed, retrying.")
+                close_old_connections()
+                time.sleep(options["interval"])
+                continue
+
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} emails, {failed} failed.")
+
+            # Keep draining while batches come back full
+            if sent + failed >= options["batch_size"]:
+                continue
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-16 22:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(
+                fields=["owner", "company_name", "id"], name="company_owner_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="company",
+            index=models.Index(
+                fields=["owner", "number_of_employees", "id"],
+                name="company_owner_employees_idx",
+            ),
+        ),
+    ]
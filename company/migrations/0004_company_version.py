@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-16 22:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0003_email_outbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-16 22:52
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+# Serves the case-insensitive `email__iexact` login lookup, which compiles to
+# UPPER("email") on PostgreSQL. The index lives on the user table of the auth
+# app, so it cannot be declared through a model Meta in this app.
+EMAIL_UPPER_INDEX = models.Index(Upper("email"), name="auth_user_email_upper_idx")
+
+
+def add_email_index(apps, schema_editor):
+    user_model = apps.get_model(settings.AUTH_USER_MODEL)
+    schema_editor.add_index(user_model, EMAIL_UPPER_INDEX)
+
+
+def remove_email_index(apps, schema_editor):
+    user_model = apps.get_model(settings.AUTH_USER_MODEL)
+    schema_editor.remove_index(user_model, EMAIL_UPPER_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0004_company_version"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(add_email_index, remove_email_index),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Keep company_ownerstats in step with every write to company_company.
+# New companies upsert the owner's row. Every other change only updates the
+# existing row: the upsert would check its proposed row against the >= 0
+# constraints, and deleting a user (whose stats row may already be gone)
+# must never recreate it.
+CREATE_TRIGGER = """
+CREATE FUNCTION company_ownerstats_add(p_owner_id integer, p_count integer, p_employees bigint)
+RETURNS void AS $$
+BEGIN
+    INSERT INTO company_ownerstats (owner_id, company_count, total_employees)
+    VALUES (p_owner_id, p_count, p_employees)
+    ON CONFLICT (owner_id) DO UPDATE SET
+        company_count = company_ownerstats.company_count + EXCLUDED.company_count,
+        total_employees = company_ownerstats.total_employees + EXCLUDED.total_employees;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION company_ownerstats_subtract(p_owner_id integer, p_count integer, p_employees bigint)
+RETURNS void AS $$
+BEGIN
+    UPDATE company_ownerstats SET
+        company_count = company_count - p_count,
+        total_employees = total_employees - p_employees
+    WHERE owner_id = p_owner_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION company_ownerstats_maintain() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM company_ownerstats_add(NEW.owner_id, 1, NEW.number_of_employees);
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM company_ownerstats_subtract(OLD.owner_id, 1, OLD.number_of_employees);
+    ELSIF NEW.owner_id <> OLD.owner_id THEN
+        PERFORM company_ownerstats_subtract(OLD.owner_id, 1, OLD.number_of_employees);
+        PERFORM company_ownerstats_add(NEW.owner_id, 1, NEW.number_of_employees);
+    ELSIF NEW.number_of_employees <> OLD.number_of_employees THEN
+        PERFORM company_ownerstats_subtract(
+            NEW.owner_id, 0, OLD.number_of_employees - NEW.number_of_employees
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER company_ownerstats_maintain
+AFTER INSERT OR DELETE OR UPDATE OF owner_id, number_of_employees ON company_company
+FOR EACH ROW EXECUTE FUNCTION company_ownerstats_maintain();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER company_ownerstats_maintain ON company_company;
+DROP FUNCTION company_ownerstats_maintain();
+DROP FUNCTION company_ownerstats_subtract(integer, integer, bigint);
+DROP FUNCTION company_ownerstats_add(integer, integer, bigint);
+"""
+
+# Seed the table from the companies that already exist
+BACKFILL = """
+INSERT INTO company_ownerstats (owner_id, company_count, total_employees)
+SELECT owner_id, COUNT(*), SUM(number_of_employees)
+FROM company_company
+GROUP BY owner_id;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("company", "0007_company_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OwnerStats",
+            fields=[
+                (
+                    "owner",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="company_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("company_count", models.PositiveIntegerField(default=0)),
+                ("total_employees", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+    ]
@@ -1,5 +1,22 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+# The text search configuration used for the company search vector and queries
+SEARCH_CONFIG = "english"
+
+
+class CompanyManager(models.Manager):
+    """
+    Default manager for companies that never loads the search vector column,
+    which is only ever used inside the database.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().defer("search_vector")
 
 
 class Company(models.Model):
@@ -12,6 +29,9 @@ class Company(models.Model):
         description (TextField): A detailed description of the company.
         number_of_employees (PositiveIntegerField): The number of employees in the company.
         owner (ForeignKey): A reference to the User model, indicating the owner of the company.
+        version (PositiveIntegerField): A counter bumped on every update, used for ETags.
+        search_vector (GeneratedField): The weighted tsvector of the name and description,
+                                        maintained by PostgreSQL.
     """
 
     id = models.AutoField(primary_key=True)
@@ -19,6 +39,37 @@ class Company(models.Model):
     description = models.TextField()
     number_of_employees = models.PositiveIntegerField()
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="companies")
+    version = models.PositiveIntegerField(default=1, editable=False)
+    search_vector = models.GeneratedField(
+        expression=SearchVector("company_name", weight="A", config=SEARCH_CONFIG)
+        + SearchVector("description", weight="B", config=SEARCH_CONFIG),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = CompanyManager()
+
+    class Meta:
+        # Match the access paths of the list view: filter by owner, order by
+        # one of the ordering fields, and break ties with the primary key
+        indexes = [
+            models.Index(
+                fields=["owner", "company_name", "id"],
+                name="company_owner_name_idx",
+            ),
+            models.Index(
+                fields=["owner", "number_of_employees", "id"],
+                name="company_owner_employees_idx",
+            ),
+            # Full-text search of the API
+            GinIndex(fields=["search_vector"], name="company_search_vector_idx"),
+            # Trigram index serving the admin `icontains` search, which
+            # compiles to UPPER(company_name) LIKE UPPER(%s)
+            GinIndex(
+                OpClass(Upper("company_name"), name="gin_trgm_ops"),
+                name="company_name_trgm_idx",
+            ),
+        ]
 
     def __str__(self):
         """
@@ -26,6 +77,19 @@ class Company(models.Model):
         """
         return self.company_name
 
+    def save(self, *args, **kwargs):
+        """
+        Move the row to a new version on every update.
+        """
+        updating = not self._state.adding
+        if updating:
+            self.version = models.F("version") + 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        super().save(*args, **kwargs)
+        if updating:
+            self.refresh_from_db(fields=["version"])
+
     # def delete(self, *args, **kwargs):
     #     """
     #     Prevents the deletion of company records through the ORM.
@@ -38,3 +102,122 @@ class Company(models.Model):
     #     Prevents the bulk deletion of company records.
     #     """
     #     raise PermissionDenied("Bulk deletion of company records is not allowed.")
+
+
+class OwnerStats(models.Model):
+    """
+    Aggregates of the companies of one owner, for dashboards.
+
+    Rows are maintained incrementally by a database trigger on the company
+    table, in the same transaction as every insert, update and delete, so
+    they never need a GROUP BY over the companies. Use the
+    `rebuild_owner_stats` command to verify or rebuild them from scratch.
+
+    Attributes:
+        owner (OneToOneField): The owner of the companies, also the primary key.
+        company_count (PositiveIntegerField): The number of companies the owner has.
+        total_employees (PositiveBigIntegerField): The sum of `number_of_employees`
+                                                   over those companies.
+    """
+
+    owner = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="company_stats"
+    )
+    company_count = models.PositiveIntegerField(default=0)
+    total_employees = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        """
+        Return the owner as string representation
+        """
+        return str(self.owner_id)
+
+    @property
+    def average_employees(self):
+        """
+        Return the average number of employees per company, or None without companies.
+        """
+        if not self.company_count:
+            return None
+        return round(self.total_employees / self.company_count, 2)
+
+
+class EmailOutbox(models.Model):
+    """
+    A queued email, written in the same transaction as the change that caused it
+    and delivered later by the `send_outbox_emails` worker.
+
+    Attributes:
+        subject (CharField): The subject line of the email.
+        message (TextField): The plain text body of the email.
+        html_message (TextField): The optional HTML body of the email.
+        from_email (CharField): The sender address.
+        recipient_list (JSONField): The list of recipient addresses.
+        status (CharField): The delivery status (pending, sent or failed).
+        attempts (PositiveIntegerField): The number of delivery attempts made so far.
+        next_attempt_at (DateTimeField): The earliest time of the next delivery attempt.
+        last_error (TextField): The error raised by the last failed attempt.
+        created_at (DateTimeField): The time the email was queued.
+        sent_at (DateTimeField): The time the email was delivered.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_SENT = "sent"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_SENT, "Sent"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    html_message = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    recipient_list = models.JSONField(default=list)
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # The worker only ever looks at pending emails that are due
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at", "id"],
+                condition=models.Q(status="pending"),
+                name="company_outbox_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        """
+        Return the subject and recipients as string representation
+        """
+        return f"{self.subject} -> {', '.join(self.recipient_list)}"
+
+
+class RevokedToken(models.Model):
+    """
+    A refresh token that can no longer be used, e.g. because it was rotated.
+
+    Rows are only needed until the token would have expired anyway, so the
+    table stays bounded by the refresh token lifetime.
+
+    Attributes:
+        jti (CharField): The unique identifier claim of the revoked token.
+        expires_at (DateTimeField): The expiry of the revoked token.
+    """
+
+    jti = models.CharField(max_length=255, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        """
+        Return the token identifier as string representation
+        """
+        return self.jti
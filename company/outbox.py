@@ -0,0 +1,160 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from company_app.metrics import observe_email_queue
+from company_app.profiling import record_phase
+
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def queue_email(subject, message, recipient_list, html_message="", from_email=None):
+    """
+    Store an email in the outbox instead of sending it right away.
+
+    When called inside a transaction, the email is only committed (and therefore
+    only delivered) if the surrounding change is committed as well.
+
+    Args:
+        subject (str): The subject line of the email.
+        message (str): The plain text body of the email.
+        recipient_list (list): The recipient addresses.
+        html_message (str): The optional HTML body of the email.
+        from_email (str): The sender address, DEFAULT_FROM_EMAIL if not given.
+
+    Returns:
+        EmailOutbox: The queued outbox entry.
+    """
+    start = time.perf_counter()
+    entry = EmailOutbox.objects.create(
+        subject=subject,
+        message=message,
+        html_message=html_message or "",
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipient_list=list(recipient_list),
+    )
+    duration = time.perf_counter() - start
+    observe_email_queue(duration)
+    record_phase("email", duration)
+    return entry
+
+
+def get_retry_delay(attempts):
+    """
+    Exponential backoff for the given number of failed attempts.
+
+    Returns:
+        timedelta: The delay before the next delivery attempt.
+    """
+    delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(delay, settings.EMAIL_OUTBOX_MAX_RETRY_DELAY))
+
+
+def build_message(entry, connection):
+    """
+    Build the email message for an outbox entry.
+    """
+    email = EmailMultiAlternatives(
+        subject=entry.subject,
+        body=entry.message,
+        from_email=entry.from_email,
+        to=entry.recipient_list,
+        connection=connection,
+    )
+    if entry.html_message:
+        email.attach_alternative(entry.html_message, "text/html")
+    return email
+
+
+def reschedule_unsent(entries, error):
+    """
+    Push back a batch that couldn't be sent because the mail server is
+    unreachable.
+
+    The outage isn't the fault of the emails, so it doesn't count as a
+    delivery attempt, the entries are only delayed like after their next
+    failed attempt.
+    """
+    logger.error("Could not connect to the mail server: %s", error)
+    now = timezone.now()
+    for entry in entries:
+        entry.last_error = str(error)
+        entry.next_attempt_at = now + get_retry_delay(entry.attempts + 1)
+    EmailOutbox.objects.bulk_update(entries, ["next_attempt_at", "last_error"])
+
+
+def send_pending_emails(batch_size=None):
+    """
+    Deliver one batch of due outbox entries over a single mail connection.
+
+    Rows are locked with SKIP LOCKED, so several workers can drain the outbox
+    concurrently without sending the same email twice. Failed deliveries are
+    rescheduled with exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS is
+    reached, after which they are marked as failed. If the mail server can't
+    be reached at all, the whole batch is rescheduled instead.
+
+    Args:
+        batch_size (int): The maximum number of emails to send, defaults to
+                          EMAIL_OUTBOX_BATCH_SIZE.
+
+    Returns:
+        tuple: The number of sent and failed emails in this batch.
+    """
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    sent = failed = 0
+
+    with transaction.atomic():
+        entries = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(
+                status=EmailOutbox.STATUS_PENDING,
+                next_attempt_at__lte=timezone.now(),
+            )
+            .order_by("next_attempt_at", "id")[:batch_size]
+        )
+        if not entries:
+            return sent, failed
+
+        # Reuse one connection for the whole batch
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            reschedule_unsent(entries, e)
+            return sent, len(entries)
+
+        try:
+            for entry in entries:
+                entry.attempts += 1
+                try:
+                    connection.send_messages([build_message(entry, connection)])
+                except Exception as e:
+                    failed += 1
+                    entry.last_error = str(e)
+                    if entry.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                        entry.status = EmailOutbox.STATUS_FAILED
+                    else:
+                        entry.next_attempt_at = timezone.now() + get_retry_delay(
+                            entry.attempts
+                        )
+                else:
+                    sent += 1
+                    entry.status = EmailOutbox.STATUS_SENT
+                    entry.sent_at = timezone.now()
+                    entry.last_error = ""
+        finally:
+            connection.close()
+
+        EmailOutbox.objects.bulk_update(
+            entries,
+            ["status", "attempts", "next_attempt_at", "last_error", "sent_at"],
+        )
+
+    return sent, failed
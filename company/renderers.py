@@ -0,0 +1,164 @@
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    A drop-in JSONRenderer that encodes with orjson.
+
+    The output is byte-identical to JSONRenderer with the default settings
+    (compact, unicode, strict) for payloads made of strings, integers,
+    booleans, None, lists and dicts, which is what the company read views
+    return. Floats are written in orjson's shortest form, so only enable it
+    on views that do not render floats.
+
+    Anything orjson cannot reproduce exactly, such as indented output for
+    the browsable API, non-default JSON settings, non-string keys or
+    integers beyond 64 bits, goes through the stock renderer, as does
+    everything when orjson is not installed.
+    """
+
+    def __init__(self):
+        self.encoder = self.encoder_class()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder.default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escape \u2028 and \u2029 like JSONRenderer, so the output stays a
+        # strict JavaScript subset
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    Base class for renderers that stream rows instead of rendering a body.
+
+    Regular payloads, such as error responses, are rendered as JSON. Row
+    exports go through `stream`, which yields the encoded output in batches.
+
+    Attributes:
+        batch_size (int): The number of rows encoded per yielded chunk.
+    """
+
+    charset = "utf-8"
+    batch_size = 500
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return json.dumps(data).encode(self.charset)
+
+    def stream(self, rows, fields):
+        """
+        Yield the encoded rows in batches.
+
+        Args:
+            rows (iterable): Tuples of values, in the order of `fields`.
+            fields (list): The field names.
+        """
+        header = self.encode_header(fields)
+        if header:
+            yield header
+
+        batch = []
+        for row in rows:
+            batch.append(self.encode_row(row, fields))
+            if len(batch) >= self.batch_size:
+                yield "".join(batch)
+                batch = []
+        if batch:
+            yield "".join(batch)
+
+    async def astream(self, rows, fields):
+        """
+        Async version of `stream`, for rows from an async iterator.
+
+        Under ASGI, Django buffers a synchronous streaming body in full before
+        sending it, so streamed exports must be async there.
+        """
+        header = self.encode_header(fields)
+        if header:
+            yield header
+
+        batch = []
+        async for row in rows:
+            batch.append(self.encode_row(row, fields))
+            if len(batch) >= self.batch_size:
+                yield "".join(batch)
+                batch = []
+        if batch:
+            yield "".join(batch)
+
+    def encode_header(self, fields):
+        return ""
+
+    def encode_row(self, row, fields):
+        raise NotImplementedError("encode_row() must be implemented.")
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """
+    Streams rows as newline delimited JSON, one object per line.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def encode_row(self, row, fields):
+        return json.dumps(dict(zip(fields, row))) + "\n"
+
+
+class _LineBuffer:
+    """
+    A file-like object that hands back whatever is written to it.
+    """
+
+    def write(self, value):
+        return value
+
+
+class CSVRenderer(StreamingRenderer):
+    """
+    Streams rows as CSV with a header line.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+
+    def __init__(self):
+        self.writer = csv.writer(_LineBuffer())
+
+    def encode_header(self, fields):
+        return self.writer.writerow(fields)
+
+    def encode_row(self, row, fields):
+        return self.writer.writerow(row)
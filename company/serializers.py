@@ -1,5 +1,47 @@
 from rest_framework import serializers
-from .models import Company
+from .models import Company, OwnerStats
+
+
+class SparseFieldsMixin:
+    """
+    Lets the caller narrow a serializer down to a subset of its fields.
+
+    Pass `fields=[...]` to drop every other field from the output. Without
+    it, all the fields of `Meta.fields` are serialized.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def parse_fields(cls, value):
+        """
+        Parse a comma separated `fields` query parameter.
+
+        Args:
+            value (str): The raw parameter, None for all fields.
+
+        Returns:
+            list: The requested field names, in the order of `Meta.fields`.
+
+        Raises:
+            ValidationError: If the parameter is empty or names an unknown field.
+        """
+        valid_fields = cls.Meta.fields
+        if value is None:
+            return list(valid_fields)
+
+        requested = {name.strip() for name in value.split(",") if name.strip()}
+        if not requested or not requested <= set(valid_fields):
+            raise serializers.ValidationError(
+                {
+                    "error": f"Invalid fields. Valid fields are: {', '.join(valid_fields)}."
+                }
+            )
+        return [name for name in valid_fields if name in requested]
 
 
 class CompanySerializer(serializers.ModelSerializer):
@@ -16,7 +58,7 @@ class CompanySerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class CompanyListSerializer(serializers.ModelSerializer):
+class CompanyListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     A serializer for creating or retrieving a subset of Company fields.
 
@@ -29,6 +71,26 @@ class CompanyListSerializer(serializers.ModelSerializer):
         model = Company
         fields = ["company_name", "description", "number_of_employees"]
 
+    @classmethod
+    def serialize_rows(cls, rows, fields=None):
+        """
+        Read-only fast path producing the `many=True` output from `values()` rows.
+
+        Skips the per-field machinery of ModelSerializer. This is only valid
+        because every field is a plain column whose representation is the
+        column value itself (a string or an integer).
+
+        Args:
+            rows (iterable): Dicts as returned by `values()`, with at least `fields`.
+            fields (list): The fields to output, all of `Meta.fields` by default.
+
+        Returns:
+            list: The serialized companies.
+        """
+        if fields is None:
+            fields = cls.Meta.fields
+        return [{name: row[name] for name in fields} for row in rows]
+
 
 class CompanyUpdateSerializer(serializers.ModelSerializer):
     """
@@ -43,3 +105,35 @@ class CompanyUpdateSerializer(serializers.ModelSerializer):
         model = Company
         # Only allow the number_of_employees field to be updated
         fields = ["number_of_employees"]
+
+
+class CompanyBatchUpdateSerializer(serializers.ModelSerializer):
+    """
+    A serializer for one item of a batch update of employee counts.
+
+    Meta:
+        model (Model): The Company model being serialized.
+        fields (list): Specifies the company id and the field that can be updated.
+    """
+
+    id = serializers.IntegerField()
+
+    class Meta:
+        model = Company
+        fields = ["id", "number_of_employees"]
+
+
+class OwnerStatsSerializer(serializers.ModelSerializer):
+    """
+    A serializer for the company statistics of an owner.
+
+    Meta:
+        model (Model): The OwnerStats model being serialized.
+        fields (list): Specifies the aggregates included in the serialized output.
+    """
+
+    average_employees = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = OwnerStats
+        fields = ["company_count", "total_employees", "average_employees"]
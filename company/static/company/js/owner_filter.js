@@ -0,0 +1,13 @@
+'use strict';
+{
+    const $ = django.jQuery;
+
+    // Reload the changelist filtered by the owner picked in the sidebar
+    $(document).on('change', 'select.owner-filter', function() {
+        const params = new URLSearchParams(this.dataset.queryString);
+        if (this.value) {
+            params.set(this.name, this.value);
+        }
+        window.location.search = params.toString();
+    });
+}
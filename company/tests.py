@@ -1,3 +1,1788 @@
-from django.test import TestCase
+import csv
+import gzip
+import importlib
+import io
+import json
+import os
+import tempfile
+from base64 import urlsafe_b64encode
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Count, F, Sum
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, include, path, resolve, reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import (
+    APIClient,
+    APIRequestFactory,
+    APITestCase,
+    force_authenticate,
+)
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+import company_app.urls
+from company_app import swagger
+from company_app.authentication import (
+    CachedJWTAuthentication,
+    UserCache,
+    add_user_claims,
+    user_cache,
+)
+from company_app.metrics import REGISTRY
+from company_app.profiling import RequestProfile
+from company_app.revocation import BloomFilter, RevocationStore, revocation_store
+from company_app.routers import REPLICA, PrimaryReplicaRouter, replica_reads
+
+from .admin import get_estimated_count
+from .async_views import ASYNC_VIEWS, AsyncExportUserCompaniesView
+from .idempotency import IdempotentRequest
+from .models import Company, EmailOutbox, OwnerStats
+from .outbox import queue_email, send_pending_emails
+from .renderers import FastJSONRenderer
+from .views import ListUserCompaniesView
+
+
+class UpdateCompanyViewTests(APITestCase):
+    """
+    Tests for the single round trip update path of UpdateCompanyView.
+    """
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        self.other = User.objects.create_user(username="other", password="secret")
+        self.company = Company.objects.create(
+            company_name="Tech Innovations",
+            description="A company focused on innovative tech solutions.",
+            number_of_employees=50,
+            owner=self.owner,
+        )
+        self.url = reverse("update_company", kwargs={"pk": self.company.pk})
+
+    def test_update_is_a_single_query(self):
+        self.client.force_authenticate(self.owner)
+
+        with self.assertNumQueries(1):
+            response = self.client.patch(
+                self.url, {"number_of_employees": 60}, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.number_of_employees, 60)
+        self.assertEqual(self.company.version, 2)
+
+    def test_update_of_missing_company_is_not_found(self):
+        self.client.force_authenticate(self.owner)
+
+        response = self.client.patch(
+            reverse("update_company", kwargs={"pk": self.company.pk + 1}),
+            {"number_of_employees": 60},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_update_of_other_users_company_is_forbidden(self):
+        self.client.force_authenticate(self.other)
+
+        with self.assertNumQueries(2):
+            response = self.client.patch(
+                self.url, {"number_of_employees": 60}, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.number_of_employees, 50)
+
+    def test_update_with_stale_if_match_fails(self):
+        self.client.force_authenticate(self.owner)
+        etag = f'"{self.company.pk}-{self.company.version}"'
+
+        response = self.client.patch(
+            self.url, {"number_of_employees": 60}, format="json", HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["ETag"], f'"{self.company.pk}-2"')
+
+        response = self.client.patch(
+            self.url, {"number_of_employees": 70}, format="json", HTTP_IF_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+
+@skipUnless(
+    REPLICA in settings.DATABASES,
+    "No read replica configured, set DB_REPLICA_HOST (e.g. to DB_HOST).",
+)
+class ReplicaRoutingTests(APITestCase):
+    """
+    Tests for the read replica routing and the read-your-writes pinning.
+
+    In tests the replica mirrors the default test database over a second
+    connection. It can't see the uncommitted rows of the test transaction,
+    so it behaves like a replica lagging behind the primary.
+    """
+
+    databases = {DEFAULT_DB_ALIAS, REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        self.company = Company.objects.create(
+            company_name="Tech Innovations",
+            description="A company focused on innovative tech solutions.",
+            number_of_employees=50,
+            owner=self.owner,
+        )
+        self.client.force_authenticate(self.owner)
+
+    def get_list(self):
+        """
+        Fetch the company list, recording the queries of both aliases.
+        """
+        with CaptureQueriesContext(
+            connections[DEFAULT_DB_ALIAS]
+        ) as primary, CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = self.client.get(reverse("list_user_companies"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(primary), len(replica)
+
+    def test_list_reads_from_replica(self):
+        response, primary_queries, replica_queries = self.get_list()
+
+        self.assertEqual(primary_queries, 0)
+        self.assertGreater(replica_queries, 0)
+        # The lagging replica doesn't have the company yet
+        self.assertEqual(response.data["count"], 0)
+
+    def test_writer_is_pinned_to_primary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("update_company", kwargs={"pk": self.company.pk}),
+                {"number_of_employees": 60},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response, primary_queries, replica_queries = self.get_list()
+
+        self.assertGreater(primary_queries, 0)
+        self.assertEqual(replica_queries, 0)
+        self.assertEqual(response.data["results"][0]["number_of_employees"], 60)
+
+    def test_writes_go_to_primary(self):
+        router = PrimaryReplicaRouter()
+        token = replica_reads.set(True)
+        try:
+            self.assertEqual(router.db_for_read(Company), REPLICA)
+            self.assertEqual(
+                router.db_for_write(Company, instance=self.company), DEFAULT_DB_ALIAS
+            )
+        finally:
+            replica_reads.reset(token)
+        self.assertIsNone(router.db_for_read(Company))
+
+
+class IdempotencyKeyTests(APITestCase):
+    """
+    Tests for the Idempotency-Key handling of CreateCompanyView.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        self.client.force_authenticate(self.owner)
+        self.url = reverse("create_company")
+        self.body = {
+            "company_name": "Tech Innovations",
+            "description": "A company focused on innovative tech solutions.",
+            "number_of_employees": 50,
+        }
+
+    def create(self, body, key="4a6f2c1e-retry"):
+        return self.client.post(
+            self.url, body, format="json", headers={"Idempotency-Key": key}
+        )
+
+    def test_retry_replays_first_response(self):
+        first = self.create(self.body)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(0):
+            retry = self.create(self.body)
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Company.objects.filter(owner=self.owner).count(), 1)
+
+    def test_key_reused_with_different_body_fails(self):
+        self.create(self.body)
+
+        response = self.create({**self.body, "company_name": "Other Company"})
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Company.objects.filter(owner=self.owner).count(), 1)
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_concurrent_request_with_same_key_conflicts(self):
+        # Another request is processing the same key
+        holder = IdempotentRequest(
+            SimpleNamespace(user=self.owner, data=self.body), "4a6f2c1e-retry"
+        )
+        self.assertIsNone(holder.begin())
+
+        response = self.create(self.body)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Company.objects.filter(owner=self.owner).exists())
+
+        # Once released without a response, the retry is processed
+        holder.finish(None)
+        response = self.create(self.body)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class BulkCreateCompaniesViewTests(APITestCase):
+    """
+    Tests for the batch inserts and per-item results of BulkCreateCompaniesView.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(
+            username="owner", email="owner@example.com", password="secret"
+        )
+        self.client.force_authenticate(self.owner)
+        self.url = reverse("bulk_create_companies")
+
+    def item(self, name, employees=10):
+        return {
+            "company_name": name,
+            "description": "A company.",
+            "number_of_employees": employees,
+        }
+
+    def create(self, items):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, items, format="json")
+
+    def get_statuses(self, response):
+        return [
+            (result["index"], result["status"]) for result in response.data["results"]
+        ]
+
+    def test_batch_is_created_with_one_insert(self):
+        items = [self.item(name) for name in ("A", "B", "C")]
+
+        # The limit check, the batch insert and the summary email, within a savepoint
+        with self.assertNumQueries(5), CaptureQueriesContext(
+            connections[DEFAULT_DB_ALIAS]
+        ) as context:
+            response = self.create(items)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual(response.data["failed"], 0)
+        self.assertEqual(
+            self.get_statuses(response),
+            [(0, "created"), (1, "created"), (2, "created")],
+        )
+        inserts = [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith('INSERT INTO "company_company"')
+        ]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            sorted(
+                Company.objects.filter(owner=self.owner).values_list(
+                    "company_name", flat=True
+                )
+            ),
+            ["A", "B", "C"],
+        )
+
+    def test_one_summary_email(self):
+        self.create([self.item(name) for name in ("A", "B")])
+
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.subject, "New Companies Created")
+        self.assertEqual(email.recipient_list, ["owner@example.com"])
+        self.assertIn("A", email.message)
+        self.assertIn("B", email.message)
+
+    def test_invalid_items_are_reported_by_index(self):
+        response = self.create(
+            [self.item("A"), {"description": "No name."}, self.item("C", -1)]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["failed"], 2)
+        self.assertEqual(
+            self.get_statuses(response), [(0, "created"), (1, "failed"), (2, "failed")]
+        )
+        self.assertIn("company_name", response.data["results"][1]["errors"])
+        self.assertIn("number_of_employees", response.data["results"][2]["errors"])
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+
+    def test_nothing_created_is_a_bad_request(self):
+        response = self.create([{"description": "No name."}])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["created"], 0)
+        self.assertFalse(Company.objects.exists())
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_malformed_batches_are_rejected(self):
+        for body in ([], self.item("A"), [self.item("A")] * 101):
+            with self.subTest(size=len(body)):
+                response = self.create(body)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("error", response.data)
+        self.assertFalse(Company.objects.exists())
+
+    def test_company_limit_counts_existing_companies(self):
+        for name in ("X", "Y", "Z"):
+            Company.objects.create(
+                company_name=name,
+                description="A company.",
+                number_of_employees=1,
+                owner=self.owner,
+            )
+
+        response = self.create([self.item(name) for name in ("A", "B", "C", "D")])
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(
+            self.get_statuses(response),
+            [(0, "created"), (1, "created"), (2, "failed"), (3, "failed")],
+        )
+        self.assertIn("error", response.data["results"][2]["errors"])
+        self.assertEqual(Company.objects.filter(owner=self.owner).count(), 5)
+
+        response = self.create([self.item("E")])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Company.objects.filter(owner=self.owner).count(), 5)
+
+    def test_company_limit_applies_within_batch(self):
+        response = self.create([self.item(str(index)) for index in range(7)])
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["created"], 5)
+        self.assertEqual(
+            [
+                index
+                for index, result in self.get_statuses(response)
+                if result == "failed"
+            ],
+            [5, 6],
+        )
+
+    def test_invalidates_owner_cache(self):
+        list_url = reverse("list_user_companies")
+        self.assertEqual(self.client.get(list_url).data["count"], 0)
+
+        self.create([self.item("A"), self.item("B")])
+
+        self.assertEqual(self.client.get(list_url).data["count"], 2)
+
+
+class BulkUpdateCompaniesViewTests(APITestCase):
+    """
+    Tests for the single UPDATE and per-item results of BulkUpdateCompaniesView.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        self.other = User.objects.create_user(username="other", password="secret")
+        self.companies = [
+            Company.objects.create(
+                company_name=name,
+                description="A company.",
+                number_of_employees=10,
+                owner=self.owner,
+            )
+            for name in ("A", "B", "C", "D", "E")
+        ]
+        self.foreign = Company.objects.create(
+            company_name="Foreign",
+            description="A company.",
+            number_of_employees=10,
+            owner=self.other,
+        )
+        self.client.force_authenticate(self.owner)
+        self.url = reverse("bulk_update_companies")
+
+    def update(self, items):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(self.url, items, format="json")
+
+    def get_errors(self, response):
+        return {
+            result["index"]: result["errors"].get("error")
+            for result in response.data["results"]
+            if result["status"] == "failed"
+        }
+
+    def test_query_count_is_independent_of_batch_size(self):
+        for size in (1, 5):
+            with self.subTest(size=size), CaptureQueriesContext(
+                connections[DEFAULT_DB_ALIAS]
+            ) as context:
+                response = self.update(
+                    [
+                        {"id": company.id, "number_of_employees": 20 + size}
+                        for company in self.companies[:size]
+                    ]
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["updated"], size)
+
+            # One ownership SELECT and one CASE UPDATE
+            statements = [query["sql"] for query in context.captured_queries]
+            self.assertEqual(len(statements), 2)
+            self.assertTrue(statements[0].startswith("SELECT"))
+            self.assertTrue(statements[1].startswith("UPDATE"))
+            self.assertIn("CASE WHEN", statements[1])
+
+    def test_updated_rows_get_new_values_and_versions(self):
+        response = self.update(
+            [
+                {"id": self.companies[0].id, "number_of_employees": 11},
+                {"id": self.companies[1].id, "number_of_employees": 12},
+            ]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = dict(
+            Company.objects.filter(owner=self.owner).values_list(
+                "company_name", "number_of_employees"
+            )
+        )
+        self.assertEqual(rows, {"A": 11, "B": 12, "C": 10, "D": 10, "E": 10})
+        versions = dict(
+            Company.objects.filter(owner=self.owner).values_list(
+                "company_name", "version"
+            )
+        )
+        self.assertEqual(versions, {"A": 2, "B": 2, "C": 1, "D": 1, "E": 1})
+
+    def test_partial_success(self):
+        missing_id = self.foreign.id + 1
+        response = self.update(
+            [
+                {"id": self.companies[0].id, "number_of_employees": 11},
+                {"id": missing_id, "number_of_employees": 12},
+                {"id": self.foreign.id, "number_of_employees": 13},
+                {"id": self.companies[0].id, "number_of_employees": 14},
+                {"id": self.companies[1].id, "number_of_employees": -1},
+                {"id": self.companies[2].id, "number_of_employees": 15},
+            ]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data["updated"], 2)
+        self.assertEqual(response.data["failed"], 4)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["updated", "failed", "failed", "failed", "failed", "updated"],
+        )
+        errors = self.get_errors(response)
+        self.assertEqual(errors[1], "Company not found.")
+        self.assertEqual(
+            errors[2], "You do not have permission to update this company."
+        )
+        self.assertEqual(errors[3], "Duplicate company id in the batch.")
+        self.assertIn("number_of_employees", response.data["results"][4]["errors"])
+
+        # The first occurrence of a duplicated id wins
+        self.companies[0].refresh_from_db()
+        self.assertEqual(self.companies[0].number_of_employees, 11)
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.number_of_employees, 10)
+        self.assertEqual(self.foreign.version, 1)
+
+    def test_nothing_updated_is_a_bad_request(self):
+        response = self.update([{"id": self.foreign.id, "number_of_employees": 13}])
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["updated"], 0)
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.number_of_employees, 10)
+
+    def test_invalidates_owner_cache(self):
+        list_url = reverse("list_user_companies")
+        self.client.get(list_url)
+
+        self.update([{"id": self.companies[0].id, "number_of_employees": 11}])
+
+        response = self.client.get(list_url, {"ordering": "company_name"})
+        self.assertEqual(response.data["results"][0]["number_of_employees"], 11)
+
+
+class EmailOutboxTests(TestCase):
+    """
+    Tests for the delivery of queued emails by `send_pending_emails`.
+    """
+
+    def setUp(self):
+        self.entry = queue_email(
+            subject="New Company Created",
+            message="Hello",
+            recipient_list=["owner@example.com"],
+        )
+
+    def test_pending_email_is_sent(self):
+        sent, failed = send_pending_emails()
+
+        self.assertEqual((sent, failed), (1, 0))
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.status, EmailOutbox.STATUS_SENT)
+        self.assertEqual(self.entry.attempts, 1)
+
+    def test_unreachable_mail_server_reschedules_batch(self):
+        connection = mock.Mock()
+        connection.open.side_effect = ConnectionRefusedError("Connection refused")
+
+        with mock.patch("company.outbox.get_connection", return_value=connection):
+            sent, failed = send_pending_emails()
+
+        self.assertEqual((sent, failed), (0, 1))
+        connection.send_messages.assert_not_called()
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.status, EmailOutbox.STATUS_PENDING)
+        self.assertEqual(self.entry.attempts, 0)
+        self.assertEqual(self.entry.last_error, "Connection refused")
+        self.assertGreater(self.entry.next_attempt_at, timezone.now())
+
+
+class CursorPaginationTests(APITestCase):
+    """
+    Tests for the keyset pagination of ListUserCompaniesView.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        # Ties on the ordering field are broken by id
+        for name, employees in (("A", 20), ("B", 10), ("C", 20), ("D", 30), ("E", 20)):
+            Company.objects.create(
+                company_name=name,
+                description="A company.",
+                number_of_employees=employees,
+                owner=self.owner,
+            )
+        self.client.force_authenticate(self.owner)
+        self.url = reverse("list_user_companies")
+        self.params = {
+            "pagination": "cursor",
+            "ordering": "number_of_employees",
+            "page_size": 2,
+        }
+
+    def get_names(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [company["company_name"] for company in response.data["results"]]
+
+    def get_with_cursor(self, payload):
+        cursor = urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        return self.client.get(self.url, {**self.params, "cursor": cursor})
+
+    def test_next_and_previous_round_trip(self):
+        pages = []
+        response = self.client.get(self.url, self.params)
+        self.assertIsNone(response.data["previous"])
+        while True:
+            pages.append(self.get_names(response))
+            if response.data["next"] is None:
+                break
+            response = self.client.get(response.data["next"])
+
+        self.assertEqual(pages, [["B", "A"], ["C", "E"], ["D"]])
+
+        # Walking back returns the same pages
+        previous_pages = []
+        while response.data["previous"] is not None:
+            response = self.client.get(response.data["previous"])
+            previous_pages.append(self.get_names(response))
+        self.assertEqual(previous_pages, [["C", "E"], ["B", "A"]])
+
+    def test_invalid_cursors_are_not_found(self):
+        company = Company.objects.get(company_name="A")
+        valid = {"o": "number_of_employees", "v": 20, "id": company.id, "r": False}
+        self.assertEqual(self.get_with_cursor(valid).status_code, status.HTTP_200_OK)
+
+        invalid_payloads = [
+            {**valid, "o": "company_name"},
+            {**valid, "v": "abc"},
+            {**valid, "v": {"gt": 1}},
+            {**valid, "v": None},
+            {**valid, "id": "1"},
+            {**valid, "r": "yes"},
+        ]
+        for payload in invalid_payloads:
+            with self.subTest(payload=payload):
+                response = self.get_with_cursor(payload)
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get(self.url, {**self.params, "cursor": "not-base64!"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SparseFieldsTests(APITestCase):
+    """
+    Tests for the `fields` query parameter of the list and retrieve views.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        self.company = Company.objects.create(
+            company_name="Acme",
+            description="A company.",
+            number_of_employees=10,
+            owner=self.owner,
+        )
+        self.client.force_authenticate(self.owner)
+        self.urls = (
+            reverse("list_user_companies"),
+            reverse("retrieve_user_company", kwargs={"pk": self.company.pk}),
+        )
+
+    def get_company(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        if "results" in response.data:
+            return response.data["results"][0]
+        return response.data
+
+    def test_all_fields_without_parameter(self):
+        for url in self.urls:
+            company = self.get_company(self.client.get(url))
+            self.assertEqual(
+                set(company), {"company_name", "description", "number_of_employees"}
+            )
+
+    def test_requested_fields_only(self):
+        for url in self.urls:
+            company = self.get_company(
+                self.client.get(url, {"fields": "number_of_employees, company_name"})
+            )
+            self.assertEqual(
+                company, {"company_name": "Acme", "number_of_employees": 10}
+            )
+
+    def test_empty_fields_rejected(self):
+        for url in self.urls:
+            for value in ("", " ", ","):
+                response = self.client.get(url, {"fields": value})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("error", response.data)
+
+    def test_unknown_field_rejected(self):
+        for url in self.urls:
+            response = self.client.get(url, {"fields": "company_name,owner"})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("error", response.data)
+
+
+class ExportUserCompaniesViewTests(APITestCase):
+    """
+    Tests for the streamed NDJSON and CSV exports.
+    """
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        other = User.objects.create_user(username="other", password="secret")
+        self.rows = [
+            ("Beta, Inc.", 'Says "hello", in quotes.', 20),
+            ("Alpha", "Zürich based.", 10),
+        ]
+        for name, description, employees in self.rows:
+            Company.objects.create(
+                company_name=name,
+                description=description,
+                number_of_employees=employees,
+                owner=self.owner,
+            )
+        Company.objects.create(
+            company_name="Hidden", description="", number_of_employees=1, owner=other
+        )
+        self.url = reverse("export_companies")
+        # Exports are ordered by company name
+        self.expected = [
+            {
+                "company_name": name,
+                "description": description,
+                "number_of_employees": employees,
+            }
+            for name, description, employees in sorted(self.rows)
+        ]
+
+    def export(self, accept):
+        self.client.force_authenticate(self.owner)
+        response = self.client.get(self.url, headers={"Accept": accept})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def parse_csv(self, content):
+        return [
+            {**row, "number_of_employees": int(row["number_of_employees"])}
+            for row in csv.DictReader(io.StringIO(content))
+        ]
+
+    def test_ndjson_export(self):
+        content = self.export("application/x-ndjson")
+
+        lines = content.splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.expected)
+
+    def test_csv_export(self):
+        content = self.export("text/csv")
+
+        self.assertEqual(self.parse_csv(content), self.expected)
+
+    async def test_async_export_is_streamed_asynchronously(self):
+        request = AsyncRequestFactory().get(self.url, headers={"Accept": "text/csv"})
+        force_authenticate(request, self.owner)
+
+        response = await AsyncExportUserCompaniesView.as_view()(request)
+
+        self.assertTrue(response.streaming)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(self.parse_csv(b"".join(chunks).decode()), self.expected)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class LoginTests(APITestCase):
+    """
+    Tests for the login lookup and the lockout after failed logins.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="secret"
+        )
+        self.url = reverse("token_obtain_pair")
+
+    def login(self, password="secret", username_or_email="owner"):
+        return self.client.post(
+            self.url,
+            {"username_or_email": username_or_email, "password": password},
+            format="json",
+        )
+
+    def test_login_by_username_or_email_is_a_single_query(self):
+        for username_or_email in ("owner", "OWNER@example.com"):
+            with self.subTest(username_or_email=username_or_email):
+                with self.assertNumQueries(1):
+                    response = self.login(username_or_email=username_or_email)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertIn("refresh", response.data)
+
+    def test_lockout_after_failed_logins(self):
+        for _ in range(settings.LOGIN_MAX_FAILED_ATTEMPTS):
+            response = self.login(password="wrong")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # Locked out even with the right password
+        response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_successful_login_resets_failures(self):
+        for _ in range(2):
+            for _ in range(settings.LOGIN_MAX_FAILED_ATTEMPTS - 1):
+                self.login(password="wrong")
+            response = self.login()
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class RefreshTokenRevocationTests(APITestCase):
+    """
+    Tests for refresh token rotation and the Bloom filter revocation store.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="owner", password="secret")
+        self.refresh = RefreshToken.for_user(self.user)
+        self.url = reverse("token_refresh")
+
+    def refresh_token(self, token):
+        return self.client.post(self.url, {"refresh": str(token)}, format="json")
+
+    def test_revoked_token_is_rejected(self):
+        revocation_store.revoke(self.refresh["jti"], self.refresh["exp"])
+
+        response = self.refresh_token(self.refresh)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_reuse_of_rotated_token_is_rejected(self):
+        response = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rotated = response.data["refresh"]
+
+        response = self.refresh_token(self.refresh)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # The token it was rotated into still works
+        response = self.refresh_token(rotated)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bloom_filter_misses_skip_the_database(self):
+        store = RevocationStore()
+        store.revoke("revoked-jti", self.refresh["exp"])
+
+        with self.assertNumQueries(0):
+            self.assertFalse(store.is_revoked("unknown-jti"))
+        with self.assertNumQueries(1):
+            self.assertTrue(store.is_revoked("revoked-jti"))
+
+    def test_bloom_false_positive_falls_through_to_database(self):
+        store = RevocationStore()
+        store.revoke("revoked-jti", self.refresh["exp"])
+
+        with mock.patch.object(BloomFilter, "__contains__", return_value=True):
+            with self.assertNumQueries(1):
+                self.assertFalse(store.is_revoked("unknown-jti"))
+
+
+@override_settings(JWT_USER_LOOKUP="cache")
+class CachedJWTAuthenticationTests(APITestCase):
+    """
+    Tests for the user lookup modes of CachedJWTAuthentication.
+    """
+
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = User.objects.create_user(
+            username="owner", email="owner@example.com", password="secret"
+        )
+        self.authentication = CachedJWTAuthentication()
+        self.factory = APIRequestFactory()
+
+    def get_token(self, claims=True):
+        refresh = RefreshToken.for_user(self.user)
+        if claims:
+            add_user_claims(refresh, self.user)
+        return str(refresh.access_token)
+
+    def authenticate(self, token):
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        user, _ = self.authentication.authenticate(request)
+        return user
+
+    def test_cache_hit_does_no_queries(self):
+        token = self.get_token()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate(token), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(token), self.user)
+
+    def test_cached_user_is_copied(self):
+        token = self.get_token()
+        self.authenticate(token).username = "changed"
+        self.assertEqual(self.authenticate(token).username, "owner")
+
+    def test_password_change_invalidates(self):
+        token = self.get_token()
+        self.authenticate(token)
+        self.user.set_password("changed")
+        self.user.save()
+        with self.assertNumQueries(1):
+            user = self.authenticate(token)
+        self.assertTrue(user.check_password("changed"))
+
+    def test_deactivation_invalidates(self):
+        token = self.get_token()
+        self.authenticate(token)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_deletion_invalidates(self):
+        token = self.get_token()
+        self.authenticate(token)
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_inactive_user_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        for mode in ("db", "cache"):
+            with self.subTest(mode=mode), self.settings(JWT_USER_LOOKUP=mode):
+                with self.assertRaises(AuthenticationFailed):
+                    self.authenticate(self.get_token())
+
+    def test_inactive_user_not_cached(self):
+        self.user.is_active = False
+        self.user.save()
+        for _ in range(2):
+            with self.assertNumQueries(1), self.assertRaises(AuthenticationFailed):
+                self.authenticate(self.get_token())
+
+    @override_settings(JWT_USER_LOOKUP="claims")
+    def test_claims_mode_does_no_queries(self):
+        token = self.get_token()
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.username, "owner")
+        self.assertEqual(user.email, "owner@example.com")
+        self.assertFalse(user.is_staff)
+
+    @override_settings(JWT_USER_LOOKUP="claims")
+    def test_claims_mode_rejects_tokens_without_claims(self):
+        with self.assertNumQueries(0), self.assertRaises(InvalidToken):
+            self.authenticate(self.get_token(claims=False))
+
+    @override_settings(JWT_USER_LOOKUP="db")
+    def test_db_mode_queries_every_request(self):
+        token = self.get_token()
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(self.authenticate(token), self.user)
+        self.assertIsNone(user_cache.get(self.user.pk))
+
+        # Changes apply at once, without the signal handlers
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_tokens_without_claims_accepted_by_cache_mode(self):
+        self.assertEqual(self.authenticate(self.get_token(claims=False)), self.user)
+
+    @mock.patch("company_app.authentication.time.monotonic")
+    def test_entries_expire_after_ttl(self, monotonic):
+        monotonic.return_value = 100.0
+        cache = UserCache(max_size=10, ttl=60)
+        cache.set(1, "user")
+        monotonic.return_value = 160.0
+        self.assertEqual(cache.get(1), "user")
+        monotonic.return_value = 160.1
+        self.assertIsNone(cache.get(1))
+
+    def test_least_recently_used_entry_evicted(self):
+        cache = UserCache(max_size=2, ttl=60)
+        cache.set(1, "first")
+        cache.set(2, "second")
+        cache.get(1)
+        cache.set(3, "third")
+        self.assertEqual(cache.get(1), "first")
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(3), "third")
+        self.assertEqual(len(cache._entries), 2)
+
+
+class OwnerCacheTests(APITestCase):
+    """
+    Tests for the per-owner response cache and its invalidation on writes.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        self.company = Company.objects.create(
+            company_name="Tech Innovations",
+            description="A company focused on innovative tech solutions.",
+            number_of_employees=50,
+            owner=self.owner,
+        )
+        self.client.force_authenticate(self.owner)
+        self.list_url = reverse("list_user_companies")
+        self.detail_url = reverse(
+            "retrieve_user_company", kwargs={"pk": self.company.pk}
+        )
+
+    def get_list(self):
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["results"]
+
+    def test_reads_are_served_from_cache(self):
+        self.get_list()
+        self.client.get(self.detail_url)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.get_list()), 1)
+            response = self.client.get(self.detail_url)
+        self.assertEqual(response.data["number_of_employees"], 50)
+
+    def test_links_follow_request_scheme(self):
+        for index in range(5):
+            Company.objects.create(
+                company_name=f"Company {index}",
+                description="A company.",
+                number_of_employees=index,
+                owner=self.owner,
+            )
+
+        for secure, scheme in ((False, "http"), (True, "https"), (False, "http")):
+            with self.subTest(scheme=scheme):
+                response = self.client.get(self.list_url, secure=secure)
+                self.assertTrue(response.data["next"].startswith(f"{scheme}://"))
+
+    @override_settings(COMPANY_CACHE_TIMEOUT=0)
+    def test_zero_timeout_disables_cache(self):
+        self.get_list()
+        Company.objects.filter(pk=self.company.pk).update(number_of_employees=60)
+
+        self.assertEqual(self.get_list()[0]["number_of_employees"], 60)
+
+    def test_create_invalidates_cache(self):
+        self.get_list()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("create_company"),
+                {
+                    "company_name": "New Company",
+                    "description": "Another company.",
+                    "number_of_employees": 5,
+                },
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(self.get_list()), 2)
+
+    def test_update_invalidates_cache(self):
+        self.get_list()
+        self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("update_company", kwargs={"pk": self.company.pk}),
+                {"number_of_employees": 60},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.get_list()[0]["number_of_employees"], 60)
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.data["number_of_employees"], 60)
+
+    def test_admin_delete_invalidates_cache(self):
+        self.get_list()
+        admin = User.objects.create_superuser(username="admin", password="secret")
+        self.client.force_login(admin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("admin:company_company_delete", args=[self.company.pk]),
+                {"post": "yes"},
+            )
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+
+        self.assertEqual(self.get_list(), [])
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConditionalRequestTests(APITestCase):
+    """
+    Tests for ETags, conditional GETs and If-Match updates.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        self.company = Company.objects.create(
+            company_name="Tech Innovations",
+            description="A company focused on innovative tech solutions.",
+            number_of_employees=50,
+            owner=self.owner,
+        )
+        self.client.force_authenticate(self.owner)
+        self.detail_url = reverse(
+            "retrieve_user_company", kwargs={"pk": self.company.pk}
+        )
+        self.update_url = reverse("update_company", kwargs={"pk": self.company.pk})
+
+    def test_if_none_match_returns_not_modified(self):
+        for url in (self.detail_url, reverse("list_user_companies")):
+            with self.subTest(url=url):
+                etag = self.client.get(url)["ETag"]
+
+                response = self.client.get(url, headers={"If-None-Match": etag})
+
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(response.content, b"")
+
+    def test_changed_company_is_sent_again(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                self.update_url, {"number_of_employees": 60}, format="json"
+            )
+
+        response = self.client.get(self.detail_url, headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["number_of_employees"], 60)
+
+    def test_stale_if_match_from_retrieve_fails(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        # Another client updates the company in the meantime
+        Company.objects.filter(pk=self.company.pk).update(version=F("version") + 1)
+
+        response = self.client.patch(
+            self.update_url,
+            {"number_of_employees": 60},
+            format="json",
+            headers={"If-Match": etag},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.number_of_employees, 50)
+
+
+class OwnerStatsTests(APITestCase):
+    """
+    Tests for the trigger-maintained per-owner statistics.
+    """
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        self.other = User.objects.create_user(username="other", password="secret")
+
+    def create(self, owner, employees):
+        return Company.objects.create(
+            company_name=f"Company {employees}",
+            description="A company.",
+            number_of_employees=employees,
+            owner=owner,
+        )
+
+    def assertStatsMatchCompanies(self):
+        expected = {
+            row["owner_id"]: (row["count"], row["total"])
+            for row in Company.objects.order_by()
+            .values("owner_id")
+            .annotate(count=Count("id"), total=Sum("number_of_employees"))
+        }
+        # Owners without companies keep a row of zeros
+        actual = {
+            stats.owner_id: (stats.company_count, stats.total_employees)
+            for stats in OwnerStats.objects.exclude(company_count=0)
+        }
+        self.assertEqual(actual, expected)
+
+    def test_stats_follow_inserts_updates_and_deletes(self):
+        first = self.create(self.owner, 10)
+        self.create(self.owner, 20)
+        Company.objects.bulk_create(
+            Company(
+                company_name="Bulk",
+                description="A company.",
+                number_of_employees=employees,
+                owner=self.other,
+            )
+            for employees in (1, 2, 3)
+        )
+        self.assertStatsMatchCompanies()
+
+        Company.objects.filter(owner=self.other).update(
+            number_of_employees=F("number_of_employees") + 5
+        )
+        first.owner = self.other
+        first.save()
+        self.assertStatsMatchCompanies()
+
+        Company.objects.filter(owner=self.owner).delete()
+        first.delete()
+        self.assertStatsMatchCompanies()
+
+    def test_stats_endpoint(self):
+        self.create(self.owner, 10)
+        self.create(self.owner, 15)
+        self.client.force_authenticate(self.owner)
+
+        response = self.client.get(reverse("company_stats"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["company_count"], 2)
+        self.assertEqual(response.data["total_employees"], 25)
+
+
+@override_settings(METRICS_TOKEN="scrape-token")
+class MetricsViewTests(APITestCase):
+    """
+    Tests for the Prometheus endpoint and the metrics recorded per view.
+    """
+
+    def setUp(self):
+        cache.clear()
+        for metric in REGISTRY:
+            metric.clear()
+            self.addCleanup(metric.clear)
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        self.url = reverse("metrics")
+
+    def scrape(self, token="scrape-token"):
+        return self.client.get(self.url, headers={"Authorization": f"Bearer {token}"})
+
+    @override_settings(METRICS_TOKEN="")
+    def test_disabled_without_token(self):
+        response = self.scrape("")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_wrong_or_missing_token_is_unauthorized(self):
+        for response in (self.scrape("wrong-token"), self.client.get(self.url)):
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+            self.assertEqual(response["WWW-Authenticate"], 'Bearer realm="metrics"')
+
+    def test_exposition_contains_view_histograms(self):
+        self.client.force_authenticate(self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("create_company"),
+                {
+                    "company_name": "Tech Innovations",
+                    "description": "A company.",
+                    "number_of_employees": 50,
+                },
+                format="json",
+            )
+        self.client.get(reverse("list_user_companies"))
+
+        response = self.scrape()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(
+            response["Content-Type"].startswith("text/plain; version=0.0.4")
+        )
+        content = response.content.decode()
+        for name in (
+            "http_request_duration_seconds",
+            "db_queries_per_request",
+            "db_query_duration_seconds_per_request",
+            "email_queue_duration_seconds",
+        ):
+            self.assertIn(f"# TYPE {name} histogram", content)
+        self.assertIn(
+            'http_request_duration_seconds_count{view="list_user_companies"} 1',
+            content,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_bucket{view="create_company",le="+Inf"} 1',
+            content,
+        )
+        self.assertIn('db_queries_per_request_count{view="create_company"} 1', content)
+        self.assertIn(
+            'email_queue_duration_seconds_count{view="create_company"} 1', content
+        )
+        self.assertNotIn('email_queue_duration_seconds_count{view="list', content)
+
+
+class ProfilingMiddlewareTests(APITestCase):
+    """
+    Tests for the Server-Timing header and the slow request log.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        token = RefreshToken.for_user(self.owner).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def create(self):
+        return self.client.post(
+            reverse("create_company"),
+            {
+                "company_name": "Tech Innovations",
+                "description": "A company.",
+                "number_of_employees": 50,
+            },
+            format="json",
+        )
+
+    def get_phases(self, response):
+        return {
+            metric.split(";")[0]: metric
+            for metric in response["Server-Timing"].split(", ")
+        }
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing_phases(self):
+        response = self.create()
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        phases = self.get_phases(response)
+        self.assertEqual(set(phases), {"auth", "db", "template", "email", "total"})
+        self.assertRegex(phases["db"], r'^db;dur=\d+\.\d{2};desc="\d+ queries"$')
+        self.assertRegex(phases["total"], r"^total;dur=\d+\.\d{2}$")
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0.001)
+    def test_slow_request_is_logged(self):
+        with self.assertLogs("company_app.slow_requests", "WARNING") as logs:
+            response = self.client.get(reverse("list_user_companies"))
+
+        self.assertNotIn("Server-Timing", response)
+        (message,) = logs.output
+        self.assertIn(
+            "Slow request: GET /api/company/ (list_user_companies) 200", message
+        )
+        self.assertIn("phase db:", message)
+        self.assertIn('FROM "company_company"', message)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=60000)
+    def test_fast_request_is_not_logged(self):
+        with self.assertNoLogs("company_app.slow_requests"):
+            response = self.client.get(reverse("list_user_companies"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(SERVER_TIMING=False, SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_nothing_emitted_when_disabled(self):
+        with self.assertNoLogs("company_app.slow_requests"):
+            response = self.create()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("Server-Timing", response)
+
+    def test_duplicate_queries_are_detected(self):
+        profile = RequestProfile(trace=True)
+        profile.record_query("SELECT 1 WHERE id = %s", 0.001)
+        profile.record_query("SELECT 2", 0.001)
+        for _ in range(3):
+            profile.record_query("SELECT 1 WHERE id = %s", 0.001)
+
+        self.assertEqual(profile.get_duplicates(), [("SELECT 1 WHERE id = %s", 4)])
+        self.assertEqual(profile.phases["db"][1], 5)
+
+        request = SimpleNamespace(method="GET", path="/", resolver_match=None)
+        with self.assertLogs("company_app.slow_requests", "WARNING") as logs:
+            profile.log_trace(request, 200, 0.5)
+        self.assertIn("5 queries", logs.output[0])
+        self.assertIn("4 duplicated", logs.output[0])
+        self.assertIn("duplicate x4: SELECT 1 WHERE id = %s", logs.output[0])
+
+
+class SchemaViewTests(APITestCase):
+    """
+    Tests for the in-memory OpenAPI schema and its ETag.
+    """
+
+    def setUp(self):
+        # Start without a generated schema, and leave none behind
+        patcher = mock.patch.dict(
+            swagger._schema_cache, {"resolver": None, "schema": None, "documents": {}}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch.object(
+            swagger.schema_view,
+            "generator_class",
+            wraps=swagger.schema_view.generator_class,
+        )
+        self.generator_class = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.url = reverse("schema-swagger-ui")
+
+    def get_schema(self, **headers):
+        return self.client.get(self.url, {"format": "openapi"}, headers=headers)
+
+    def test_schema_is_generated_once(self):
+        first = self.get_schema()
+        second = self.get_schema()
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(self.generator_class.call_count, 1)
+        self.assertIn("/company/", json.loads(first.content)["paths"])
+        self.assertIn("no-cache", first["Cache-Control"])
+
+    def test_if_none_match_returns_not_modified(self):
+        etag = self.get_schema()["ETag"]
+
+        response = self.get_schema(**{"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.get_schema(**{"If-None-Match": '"outdated"'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_export_writes_served_document(self):
+        served = self.get_schema()
+
+        stdout = io.StringIO()
+        call_command("export_openapi_schema", stdout=stdout)
+        self.assertEqual(stdout.getvalue().rstrip("\n"), served.content.decode())
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "schema.yaml")
+            stderr = io.StringIO()
+            call_command(
+                "export_openapi_schema",
+                format="yaml",
+                output=path,
+                stderr=stderr,
+            )
+            with open(path, "rb") as output:
+                self.assertIn(b"\n  /company/:\n", output.read())
+        self.assertIn("ETag", stderr.getvalue())
+
+        # Every format is rendered from the same generated schema
+        self.assertEqual(self.generator_class.call_count, 1)
+
+
+class FastJSONRendererTests(TestCase):
+    """
+    Tests for the orjson based FastJSONRenderer.
+    """
+
+    def test_output_matches_json_renderer(self):
+        data = {
+            "count": 2,
+            "next": None,
+            "results": [
+                {"company_name": "Zürich AG", "description": 'A "quoted"\u2028line'},
+                {"company_name": "東京", "number_of_employees": 0, "active": True},
+            ],
+        }
+
+        content = FastJSONRenderer().render(data)
+
+        self.assertEqual(content, JSONRenderer().render(data))
+        self.assertEqual(json.loads(content), data)
+
+    def test_list_response_parses(self):
+        owner = User.objects.create_user(username="owner", password="secret")
+        Company.objects.create(
+            company_name="Zürich AG",
+            description="A company.",
+            number_of_employees=5,
+            owner=owner,
+        )
+        client = APIClient()
+        client.force_authenticate(owner)
+
+        response = client.get(reverse("list_user_companies"))
+
+        self.assertEqual(json.loads(response.content), response.data)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=0)
+class CompressionTests(APITestCase):
+    """
+    Tests for the negotiated gzip compression of responses.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        for employees in range(3):
+            Company.objects.create(
+                company_name=f"Company {employees}",
+                description="A company.",
+                number_of_employees=employees,
+                owner=self.owner,
+            )
+        self.client.force_authenticate(self.owner)
+
+    def test_compressed_json_parses(self):
+        url = reverse("list_user_companies")
+        plain = self.client.get(url)
+
+        response = self.client.get(url, headers={"Accept-Encoding": "gzip"})
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(response["ETag"], f"W/{plain['ETag']}")
+        self.assertEqual(json.loads(gzip.decompress(response.content)), plain.data)
+
+    def test_not_modified_matches_compressed_response(self):
+        url = reverse("list_user_companies")
+        etag = self.client.get(url, headers={"Accept-Encoding": "gzip"})["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+
+        response = self.client.get(
+            url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    @override_settings(COMPRESSION_MIN_SIZE=1000000)
+    def test_small_response_gets_weak_etag_when_gzip_accepted(self):
+        url = reverse(
+            "retrieve_user_company", kwargs={"pk": Company.objects.first().pk}
+        )
+        plain = self.client.get(url)
+
+        response = self.client.get(url, headers={"Accept-Encoding": "gzip"})
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response["ETag"], f"W/{plain['ETag']}")
+        self.assertTrue(plain["ETag"].startswith('"'))
+
+    def test_refused_gzip_is_not_compressed(self):
+        response = self.client.get(
+            reverse("list_user_companies"), headers={"Accept-Encoding": "gzip;q=0"}
+        )
+
+        self.assertFalse(response.has_header("Content-Encoding"))
+        json.loads(response.content)
+
+    def test_compressed_stream_parses(self):
+        response = self.client.get(
+            reverse("export_companies"),
+            headers={"Accept": "application/x-ndjson", "Accept-Encoding": "gzip"},
+        )
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        content = gzip.decompress(b"".join(response.streaming_content)).decode()
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row["number_of_employees"] for row in rows], [0, 1, 2])
+
+
+class CompanyAdminTests(TestCase):
+    """
+    Tests for the Company changelist in the admin.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username="admin", password="secret")
+        self.owner = User.objects.create_user(username="tech", password="secret")
+        self.other = User.objects.create_user(username="other", password="secret")
+        self.owned = Company.objects.create(
+            company_name="Acme",
+            description="A company.",
+            number_of_employees=10,
+            owner=self.owner,
+        )
+        self.named = Company.objects.create(
+            company_name="Techno",
+            description="A company.",
+            number_of_employees=10,
+            owner=self.other,
+        )
+        Company.objects.create(
+            company_name="Globex",
+            description="A company.",
+            number_of_employees=10,
+            owner=self.other,
+        )
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:company_company_changelist")
+
+    def get_results(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return set(response.context["cl"].result_list)
+
+    def test_search_matches_name_or_exact_owner(self):
+        self.assertEqual(self.get_results({"q": "tech"}), {self.owned, self.named})
+        self.assertEqual(self.get_results({"q": "tec"}), {self.named})
+
+    def test_search_terms_all_match(self):
+        self.assertEqual(self.get_results({"q": "tech acme"}), {self.owned})
+        self.assertEqual(self.get_results({"q": '"tech" globex'}), set())
+
+    def test_search_filters_companies_alone(self):
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as context:
+            self.get_results({"q": "tech"})
+        searches = [
+            query["sql"]
+            for query in context.captured_queries
+            if "LIKE" in query["sql"] and "COUNT" not in query["sql"]
+        ]
+        self.assertTrue(searches)
+        for sql in searches:
+            where = sql.split("WHERE", 1)[1]
+            self.assertNotIn("auth_user", where)
+            self.assertIn(f'owner_id" = {self.owner.id}', where)
+
+    def get_count(self, params, estimate):
+        with mock.patch(
+            "company.admin.get_estimated_count", return_value=estimate
+        ) as get_estimate:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.context["cl"].result_count, get_estimate.called
+
+    def test_small_table_is_counted_exactly(self):
+        self.assertEqual(self.get_count({}, 10), (3, True))
+        self.assertEqual(self.get_count({}, None), (3, True))
+
+    def test_large_table_count_is_estimated(self):
+        self.assertEqual(self.get_count({}, 250000), (250000, True))
+
+    def test_filtered_changelist_is_counted_exactly(self):
+        self.assertEqual(self.get_count({"q": "tech"}, 250000), (2, False))
+        self.assertEqual(
+            self.get_count({"owner__id__exact": self.other.id}, 250000), (2, False)
+        )
+
+    def test_estimated_count_from_table_statistics(self):
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute("ANALYZE company_company")
+        self.assertEqual(get_estimated_count(Company, DEFAULT_DB_ALIAS), 3)
+
+    def test_owner_filter(self):
+        self.assertEqual(
+            self.get_results({"owner__id__exact": self.owner.id}), {self.owned}
+        )
+
+        response = self.client.get(self.url)
+        self.assertContains(response, 'name="owner__id__exact"')
+        self.assertContains(response, "company/js/owner_filter.js")
+
+    def test_invalid_owner_filter_is_rejected(self):
+        response = self.client.get(self.url, {"owner__id__exact": "abc"})
+        self.assertRedirects(response, f"{self.url}?e=1", fetch_redirect_response=False)
+
+
+# The project's URL conf serving the async company views, as with ASYNC_VIEWS=True.
+# The async routes come first, so they win when resolving
+urlpatterns = [
+    path("api/company/", include("company.async_urls")),
+    *company_app.urls.urlpatterns,
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncUpdateCompanyViewTests(UpdateCompanyViewTests):
+    """
+    Runs the UpdateCompanyView tests against AsyncUpdateCompanyView.
+    """
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncIdempotencyKeyTests(IdempotencyKeyTests):
+    """
+    Runs the CreateCompanyView Idempotency-Key tests against AsyncCreateCompanyView.
+    """
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncCursorPaginationTests(CursorPaginationTests):
+    """
+    Runs the keyset pagination tests against AsyncListUserCompaniesView.
+    """
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncSparseFieldsTests(SparseFieldsTests):
+    """
+    Runs the sparse fieldset tests against the async list and retrieve views.
+    """
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncOwnerCacheTests(OwnerCacheTests):
+    """
+    Runs the response cache tests against the async views.
+    """
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncConditionalRequestTests(ConditionalRequestTests):
+    """
+    Runs the ETag and If-Match tests against the async views.
+    """
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(APITestCase):
+    """
+    Tests for the routing of the async views and `AsyncViewMixin.dispatch`.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username="owner", password="secret")
+        self.company = Company.objects.create(
+            company_name="Tech Innovations",
+            description="A company focused on innovative tech solutions.",
+            number_of_employees=50,
+            owner=self.owner,
+        )
+        self.list_url = reverse("list_user_companies")
+        self.update_url = reverse("update_company", kwargs={"pk": self.company.pk})
+
+    def test_async_urls_route_to_async_views(self):
+        for name, view_class in ASYNC_VIEWS.items():
+            with self.subTest(name=name):
+                kwargs = {}
+                if name in ("retrieve_user_company", "update_company"):
+                    kwargs = {"pk": self.company.pk}
+                match = resolve(reverse(name, kwargs=kwargs))
+                self.assertIs(match.func.view_class, view_class)
+                self.assertTrue(view_class.view_is_async)
+
+        # Routes without an async view are kept
+        match = resolve(reverse("bulk_create_companies"))
+        self.assertFalse(match.func.view_class.view_is_async)
+
+    def test_project_urls_follow_setting(self):
+        def reload_urls():
+            importlib.reload(company_app.urls)
+            clear_url_caches()
+
+        self.addCleanup(reload_urls)
+        for enabled, view_class in (
+            (True, ASYNC_VIEWS["list_user_companies"]),
+            (False, ListUserCompaniesView),
+        ):
+            with self.subTest(enabled=enabled), self.settings(ASYNC_VIEWS=enabled):
+                reload_urls()
+                match = resolve("/api/company/", urlconf=company_app.urls)
+                self.assertIs(match.func.view_class, view_class)
+
+    def test_authentication_errors_are_handled(self):
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_handler_errors_are_handled(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.get(self.list_url, {"ordering": "owner"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("error", response.data)
+
+    def test_unsupported_method_not_allowed(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.delete(self.update_url)
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_options_answered(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.options(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("renders", response.data)
+
+    def test_unexpected_errors_propagate(self):
+        self.client.force_authenticate(self.owner)
+        view_class = ASYNC_VIEWS["list_user_companies"]
+        with mock.patch.object(
+            view_class, "get_list_params", side_effect=RuntimeError("boom")
+        ):
+            with self.assertRaisesMessage(RuntimeError, "boom"):
+                self.client.get(self.list_url)
@@ -1,16 +1,30 @@
 from django.urls import path
 from .views import (
     ListUserCompaniesView,
+    ExportUserCompaniesView,
+    OwnerStatsView,
     CreateCompanyView,
+    BulkCreateCompaniesView,
     RetrieveUserCompanyView,
     UpdateCompanyView,
+    BulkUpdateCompaniesView,
 )
 
 urlpatterns = [
     # A route that allows the user to create a company record
     path("create/", CreateCompanyView.as_view(), name="create_company"),
+    # A route that allows the user to create several company records at once
+    path(
+        "bulk-create/",
+        BulkCreateCompaniesView.as_view(),
+        name="bulk_create_companies",
+    ),
     # A route that fetches all company records created by the current user
     path("", ListUserCompaniesView.as_view(), name="list_user_companies"),
+    # A route that streams all company records created by the current user
+    path("export/", ExportUserCompaniesView.as_view(), name="export_companies"),
+    # A route that fetches the company statistics of the current user
+    path("stats/", OwnerStatsView.as_view(), name="company_stats"),
     # A route that fetches a company record by its ID
     path(
         "<int:pk>/",
@@ -19,4 +33,10 @@ urlpatterns = [
     ),
     # A route that updates a company's record's number of employees
     path("<int:pk>/update/", UpdateCompanyView.as_view(), name="update_company"),
+    # A route that updates the number of employees of many companies at once
+    path(
+        "bulk-update/",
+        BulkUpdateCompaniesView.as_view(),
+        name="bulk_update_companies",
+    ),
 ]
@@ -2,20 +2,110 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
-from rest_framework import status
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.generics import CreateAPIView, UpdateAPIView, RetrieveAPIView
 
-from django.conf import settings
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 
-from company.models import Company
-from .serializers import CompanyListSerializer, CompanyUpdateSerializer
+from django.conf import settings
+from django.core.paginator import InvalidPage, Page
+from django.http import StreamingHttpResponse
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Q, Value, When
+from django.contrib.postgres.search import SearchQuery, SearchRank
+
+from company.models import SEARCH_CONFIG, Company, OwnerStats
+from company_app.profiling import phase
+from company_app.routers import start_replica_reads, stop_replica_reads
+from .cache import (
+    get_cached_response,
+    invalidate_owner_cache,
+    make_cache_key,
+    set_cached_response,
+)
+from .conditional import (
+    PreconditionFailed,
+    get_company_etag,
+    get_list_etag,
+    get_if_match_versions,
+    if_none_match,
+    not_modified,
+)
+from .idempotency import IDEMPOTENCY_HEADER, IdempotentRequest
+from .outbox import queue_email
+from .renderers import CSVRenderer, FastJSONRenderer, NDJSONRenderer
+from .serializers import (
+    CompanyBatchUpdateSerializer,
+    CompanyListSerializer,
+    CompanyUpdateSerializer,
+    OwnerStatsSerializer,
+)
 from rest_framework.exceptions import ValidationError, PermissionDenied, NotFound
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+# The maximum number of companies a single user can own
+MAX_COMPANIES_PER_USER = 5
+
+# The maximum number of items accepted by a single bulk create request
+MAX_BULK_CREATE_ITEMS = 100
+
+# The maximum number of items accepted by a single batch update request
+MAX_BULK_UPDATE_ITEMS = 1000
+
+# Fields the company list can be ordered by. description has no index, see
+# UNINDEXED_ORDERING_FIELDS
+ORDERING_FIELDS = ("company_name", "description", "number_of_employees")
+
+# Orderings served by sorting the owner's rows, as a btree index over an
+# unbounded text column can exceed the index row size limit. The sort is
+# cheap, since an owner has at most MAX_COMPANIES_PER_USER companies
+UNINDEXED_ORDERING_FIELDS = ("description",)
+
+# Sparse fieldset parameter shared by the list and retrieve views
+FIELDS_PARAMETER = openapi.Parameter(
+    name="fields",
+    in_=openapi.IN_QUERY,
+    description=(
+        "Comma separated subset of fields to return (e.g. 'company_name,number_of_employees'). "
+        "Fields that are left out are not fetched from the database either."
+    ),
+    type=openapi.TYPE_STRING,
+)
+
+# Idempotency-Key header of the create view
+IDEMPOTENCY_KEY_PARAMETER = openapi.Parameter(
+    name=IDEMPOTENCY_HEADER,
+    in_=openapi.IN_HEADER,
+    description=(
+        "Unique key of the request, e.g. a UUID. Retries with the same key get the "
+        "first response back instead of creating the company again."
+    ),
+    type=openapi.TYPE_STRING,
+)
+
+
+def respond_from_cache(request, cached):
+    """
+    Answer a request from a cached response, with a 304 when the client's
+    copy is still current.
+
+    Args:
+        request (Request): The HTTP request object.
+        cached (dict): The cached `etag` and response `data`.
+
+    Returns:
+        Response: The cached response or a 304 Not Modified.
+    """
+    if if_none_match(request, cached["etag"]):
+        return not_modified(cached["etag"])
+    return Response(cached["data"], headers={"ETag": cached["etag"]})
+
 
 class CreateCompanyView(CreateAPIView):
     """
@@ -32,15 +122,21 @@ class CreateCompanyView(CreateAPIView):
     @swagger_auto_schema(
         operation_description="A view for creating a new company, validating content, and notifying the user via email.",
         request_body=CompanyListSerializer,
+        manual_parameters=[IDEMPOTENCY_KEY_PARAMETER],
         responses={
             201: "Company created successfully.",
             400: "Validation error or request issues.",
+            409: "A request with the same Idempotency-Key is still being processed.",
+            422: "The Idempotency-Key was already used with a different request body.",
         },
     )
     def post(self, request, *args, **kwargs):
         """
         Validate the request before processing it.
 
+        With an Idempotency-Key header the first response for the key is
+        stored, and retries get it back without creating the company again.
+
         Args:
             request (Request): The HTTP request object.
 
@@ -48,6 +144,37 @@ class CreateCompanyView(CreateAPIView):
             Response: An HTTP response indicating success or failure.
         """
 
+        error = self.check_request(request)
+        if error is not None:
+            return error
+
+        idempotent = IdempotentRequest.from_request(request)
+        if idempotent is None:
+            return super().post(request, *args, **kwargs)
+
+        replayed = idempotent.begin()
+        if replayed is not None:
+            return replayed
+
+        response = None
+        try:
+            response = super().post(request, *args, **kwargs)
+        except Exception as exc:
+            # Client errors are replayed like successes, server errors re-raise
+            response = self.handle_exception(exc)
+        finally:
+            idempotent.finish(response)
+
+        return response
+
+    def check_request(self, request):
+        """
+        Check the content type and the presence of a body.
+
+        Returns:
+            Response: The error response, or None if the request is acceptable.
+        """
+
         # Check if the Content-Type is application/json
         if "application/json" not in request.content_type:
             return Response(
@@ -62,12 +189,16 @@ class CreateCompanyView(CreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        return super().post(request, *args, **kwargs)
+        return None
 
     def perform_create(self, serializer):
         """
         Performs additional checks and actions during the company creation process.
 
+        The confirmation email is written to the outbox in the same transaction
+        as the company and delivered by the `send_outbox_emails` worker, so the
+        mail server never delays or fails the request.
+
         Args:
             serializer (Serializer): The validated serializer data.
 
@@ -77,32 +208,169 @@ class CreateCompanyView(CreateAPIView):
 
         user = self.request.user
 
-        # Check if the user has already created 5 companies
-        if user.companies.count() >= 5:
-            raise ValidationError({"error": "You can only create up to 5 companies."})
-
-        # Save the company with the current user as the owner
-        company = serializer.save(owner=user)
-
-        # Render HTML template for the message
-        message = render_to_string(
-            "confirmation_email.html",
-            {"user": user, "company": company},
-        )
-
-        # Send email notification
-        try:
-            send_mail(
+        with transaction.atomic():
+            # Check if the user has already created 5 companies
+            if user.companies.count() >= MAX_COMPANIES_PER_USER:
+                raise ValidationError(
+                    {
+                        "error": f"You can only create up to {MAX_COMPANIES_PER_USER} companies."
+                    }
+                )
+
+            # Save the company with the current user as the owner
+            company = serializer.save(owner=user)
+            invalidate_owner_cache(user.id)
+
+            # Render HTML template for the message
+            with phase("template"):
+                message = render_to_string(
+                    "confirmation_email.html",
+                    {"user": user, "company": company},
+                )
+
+            # Queue email notification
+            queue_email(
                 subject="New Company Created",
                 message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
                 recipient_list=(
                     [user.email] if user.email else [settings.DEFAULT_TO_EMAIL]
                 ),
                 html_message=message,
             )
-        except Exception as e:
-            raise ValidationError({"error": f"Failed to send email: {str(e)}"})
+
+
+class BulkCreateCompaniesView(APIView):
+    """
+    A view for creating several companies in one request and notifying the user
+    with a single summary email.
+
+    Attributes:
+        permission_classes (list): Permissions to access the view (authenticated users only).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="A view for creating several companies in one request and notifying the user with a single summary email.",
+        request_body=CompanyListSerializer(many=True),
+        responses={
+            201: "All companies created successfully.",
+            207: "Some companies were created, see the per-item results.",
+            400: "No company was created, see the per-item results.",
+            415: "Invalid content type.",
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        """
+        Validates every item, inserts the valid ones with a single `bulk_create`
+        and reports the outcome of each item.
+
+        Valid items are accepted in request order until the user reaches the
+        company limit, the remaining ones are reported as failed.
+
+        Args:
+            request (Request): The HTTP request object.
+
+        Returns:
+            Response: The per-item results with the matching status code.
+        """
+
+        # Check if the Content-Type is application/json
+        if "application/json" not in request.content_type:
+            return Response(
+                {"error": "Invalid content type. Please provide a JSON array."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        # Check if the request data is a non-empty array of a sane size
+        if not isinstance(request.data, list) or not request.data:
+            return Response(
+                {"error": "Request body must be a non-empty JSON array."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(request.data) > MAX_BULK_CREATE_ITEMS:
+            return Response(
+                {
+                    "error": f"A single request can create at most {MAX_BULK_CREATE_ITEMS} companies."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Validate every item on its own, so errors can be reported per item
+        serializer = CompanyListSerializer(data=request.data, many=True)
+        results = []
+        valid_items = []
+        for index, item in enumerate(request.data):
+            try:
+                valid_items.append((index, serializer.child.run_validation(item)))
+            except ValidationError as e:
+                results.append({"index": index, "status": "failed", "errors": e.detail})
+
+        user = request.user
+        companies = []
+
+        with transaction.atomic():
+            # Enforce the company limit across the whole batch
+            remaining = MAX_COMPANIES_PER_USER - user.companies.count()
+            accepted = valid_items[: max(remaining, 0)]
+            for index, _ in valid_items[len(accepted) :]:
+                results.append(
+                    {
+                        "index": index,
+                        "status": "failed",
+                        "errors": {
+                            "error": f"You can only create up to {MAX_COMPANIES_PER_USER} companies."
+                        },
+                    }
+                )
+
+            if accepted:
+                companies = Company.objects.bulk_create(
+                    [Company(owner=user, **data) for _, data in accepted]
+                )
+                invalidate_owner_cache(user.id)
+
+                # Render one summary email for the whole batch
+                with phase("template"):
+                    message = render_to_string(
+                        "confirmation_email.html",
+                        {"user": user, "companies": companies},
+                    )
+                queue_email(
+                    subject="New Companies Created",
+                    message=message,
+                    recipient_list=(
+                        [user.email] if user.email else [settings.DEFAULT_TO_EMAIL]
+                    ),
+                    html_message=message,
+                )
+
+        for (index, _), company in zip(accepted, companies):
+            results.append(
+                {
+                    "index": index,
+                    "status": "created",
+                    "id": company.id,
+                    **CompanyListSerializer(company).data,
+                }
+            )
+        results.sort(key=lambda result: result["index"])
+
+        if not companies:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(companies) < len(request.data):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+
+        return Response(
+            {
+                "created": len(companies),
+                "failed": len(request.data) - len(companies),
+                "results": results,
+            },
+            status=response_status,
+        )
 
 
 class CompanyPagination(PageNumberPagination):
@@ -119,21 +387,260 @@ class CompanyPagination(PageNumberPagination):
     page_size_query_param = "page_size"
     max_page_size = 100  # Optional: limit the max page size
 
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async version of `paginate_queryset`, counting the companies and
+        fetching the page with the async ORM.
+        """
+        self.request = request
+        page_size = self.get_page_size(request)
+        paginator = self.django_paginator_class(queryset, page_size)
+
+        # With the count known up front, the paginator never queries itself
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+
+        bottom = (number - 1) * page_size
+        rows = [company async for company in queryset[bottom : bottom + page_size]]
+        self.page = Page(rows, number, paginator)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            # The browsable API should display pagination controls.
+            self.display_page_controls = True
+
+        return rows
 
-class ListUserCompaniesView(APIView):
+
+class CompanyCursorPagination(BasePagination):
+    """
+    Keyset (cursor) pagination for company listings.
+
+    Instead of an OFFSET and a COUNT(*), every page is fetched with a
+    `WHERE (field, id) > (value, id)` condition on the last row seen, so deep
+    pages cost the same as the first one. The `id` column is used as a
+    tiebreaker, which makes any of the non-unique ordering fields usable.
+    Pages are `values()` rows, which must include `id` and the ordering field.
+
+    Attributes:
+        page_size (int): The default number of companies per page.
+        page_size_query_param (str): The query parameter for the client to set the page size.
+        max_page_size (int): The maximum allowable page size.
+        cursor_query_param (str): The query parameter carrying the opaque cursor.
+        mode_query_param (str): The query parameter used to request cursor mode.
+        invalid_cursor_message (str): The error message for a malformed cursor.
+    """
+
+    page_size = CompanyPagination.page_size
+    page_size_query_param = CompanyPagination.page_size_query_param
+    max_page_size = CompanyPagination.max_page_size
+    cursor_query_param = "cursor"
+    mode_query_param = "pagination"
+    invalid_cursor_message = "Invalid cursor."
+
+    def __init__(self, ordering):
+        self.ordering = ordering
+        self.field = ordering.lstrip("-")
+        self.descending = ordering.startswith("-")
+
+    @classmethod
+    def is_requested(cls, request):
+        """
+        Return True if the client asked for cursor pagination.
+        """
+        return (
+            request.query_params.get(cls.mode_query_param) == "cursor"
+            or cls.cursor_query_param in request.query_params
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, company, reverse):
+        """
+        Build an opaque cursor pointing at the given company row.
+        """
+        payload = {
+            "o": self.ordering,
+            "v": company[self.field],
+            "id": company["id"],
+            "r": reverse,
+        }
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return urlsafe_b64encode(raw).decode("ascii")
+
+    def decode_cursor(self, request):
+        """
+        Decode the cursor from the request, or return None if there is none.
+
+        Raises:
+            NotFound: If the cursor is malformed, belongs to another ordering or
+                      holds a value that doesn't fit the ordering field.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            cursor = (payload["v"], payload["id"], payload["r"])
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error):
+            raise NotFound({"error": self.invalid_cursor_message})
+
+        # A cursor is only meaningful for the ordering it was created with
+        if payload.get("o") != self.ordering:
+            raise NotFound({"error": self.invalid_cursor_message})
+
+        # The values end up in the query, so they must match the column types
+        value, pk, reverse = cursor
+        if (
+            not self.is_valid_value(value)
+            or type(pk) is not int
+            or not isinstance(reverse, bool)
+        ):
+            raise NotFound({"error": self.invalid_cursor_message})
+
+        return cursor
+
+    def is_valid_value(self, value):
+        """
+        Return True if a cursor value fits the type of the ordering field.
+        """
+        field = Company._meta.get_field(self.field)
+        if value is None:
+            return field.null
+        if field.get_internal_type() in ("CharField", "TextField"):
+            return isinstance(value, str)
+        # The remaining ordering fields are integers, booleans are rejected too
+        return type(value) is int
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_queryset = self.get_page_queryset(queryset, request)
+        return self.set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async version of `paginate_queryset`, fetching the page with the async ORM.
+        """
+        page_queryset = self.get_page_queryset(queryset, request)
+        return self.set_page([company async for company in page_queryset])
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Return the (lazy) queryset of the requested page, with one extra row.
+        """
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        self.cursor = cursor = self.decode_cursor(request)
+        self.reverse = reverse = bool(cursor and cursor[2])
+
+        # Walking backwards flips both the comparison and the sort direction
+        descending = self.descending != reverse
+        lookup = "lt" if descending else "gt"
+        prefix = "-" if descending else ""
+
+        if cursor is not None:
+            value, pk = cursor[0], cursor[1]
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{lookup}": value})
+                | Q(**{self.field: value, f"id__{lookup}": pk})
+            )
+
+        queryset = queryset.order_by(f"{prefix}{self.field}", f"{prefix}id")
+
+        # Fetch one extra row to find out whether there is a following page
+        return queryset[: self.page_size_value + 1]
+
+    def set_page(self, results):
+        """
+        Store the fetched rows of `get_page_queryset` as the current page.
+        """
+        has_more = len(results) > self.page_size_value
+        results = results[: self.page_size_value]
+
+        if self.reverse:
+            results.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_previous, self.has_next = self.cursor is not None, has_more
+
+        self.page = results
+        return results
+
+    def get_link(self, company, reverse):
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.mode_query_param, "cursor")
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(company, reverse)
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.get_link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.get_link(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+
+class ReplicaReadMixin:
+    """
+    Sends the reads of a view to the read replica, if one is configured.
+
+    Users who wrote recently are pinned to the primary instead, so they
+    always read their own writes. Authentication happens before the switch
+    and still reads from the primary.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        start_replica_reads(request.user.id)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        stop_replica_reads()
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ListUserCompaniesView(ReplicaReadMixin, APIView):
     """
     A view for listing all companies owned by the authenticated user with pagination and optional ordering.
 
     Attributes:
         permission_classes (list): Permissions to access the view (authenticated users only).
+        renderer_classes (list): JSON is encoded by the byte-identical FastJSONRenderer.
     """
 
     permission_classes = [IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     # Define parameters for Swagger (APIView doesn't expose them)
     @swagger_auto_schema(
         operation_description="A view for listing all companies owned by the authenticated user with pagination and optional ordering.",
         manual_parameters=[
+            FIELDS_PARAMETER,
             openapi.Parameter(
                 name="page_size",
                 in_=openapi.IN_QUERY,
@@ -146,9 +653,29 @@ class ListUserCompaniesView(APIView):
                 description="Field to order by (e.g., 'company_name', '-company_name').",
                 type=openapi.TYPE_STRING,
             ),
+            openapi.Parameter(
+                name="search",
+                in_=openapi.IN_QUERY,
+                description="Full-text search of the name and description (web search syntax, e.g. 'cloud -consulting'). Results are ranked by relevance unless an ordering is given.",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                name="pagination",
+                in_=openapi.IN_QUERY,
+                description="Set to 'cursor' to use keyset pagination instead of page numbers.",
+                type=openapi.TYPE_STRING,
+                enum=["page", "cursor"],
+            ),
+            openapi.Parameter(
+                name="cursor",
+                in_=openapi.IN_QUERY,
+                description="Opaque cursor taken from the 'next' or 'previous' link (cursor mode only).",
+                type=openapi.TYPE_STRING,
+            ),
         ],
         responses={
             200: "Paginated list of companies.",
+            304: "Not modified since the If-None-Match ETag.",
             400: "Invalid ordering field or request issues.",
         },
     )
@@ -156,6 +683,16 @@ class ListUserCompaniesView(APIView):
         """
         Retrieves the list of companies, supports sorting and pagination.
 
+        Page number pagination is used by default, `?pagination=cursor`
+        switches to keyset pagination with opaque next/previous cursors.
+
+        `?search=` filters the companies with the full-text index of the name
+        and description. Without an explicit ordering, page number results
+        are ranked by relevance. Cursor mode always needs a column to seek
+        on, so there the ordering still defaults to the company name.
+
+        `?fields=` narrows both the response and the selected columns.
+
         Args:
             request (Request): The HTTP request object.
 
@@ -163,57 +700,276 @@ class ListUserCompaniesView(APIView):
             Response: A paginated response containing the serialized company data.
         """
 
-        # Get all companies owned by the authenticated user
-        user = request.user
-        companies = Company.objects.filter(owner=user)
+        params = self.get_list_params(request)
+
+        # Serve the page from the per-owner cache when possible
+        cache_key = make_cache_key(
+            request.user.id, "list", **self.get_cache_params(request, params)
+        )
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            return respond_from_cache(request, cached)
+
+        companies, paginator = self.get_page_queryset(request, params)
+        paginated_companies = paginator.paginate_queryset(companies, request)
+
+        response = self.get_page_response(
+            request, paginator, paginated_companies, params
+        )
+        if response.status_code == status.HTTP_200_OK:
+            set_cached_response(
+                cache_key, {"etag": response["ETag"], "data": response.data}
+            )
+
+        return response
+
+    def get_list_params(self, request):
+        """
+        Parse and validate the query parameters of the list.
+
+        Returns:
+            dict: The ordering, fields, search terms, whether cursor pagination
+                  is requested and whether the results are ranked.
+
+        Raises:
+            ValidationError: If the ordering or the fields are invalid.
+        """
 
         # Get ordering parameter from the request, default is 'company_name'
         ordering = request.query_params.get("ordering", "company_name")
+        fields = CompanyListSerializer.parse_fields(request.query_params.get("fields"))
+        search = request.query_params.get("search", "").strip()
+        cursor_mode = CompanyCursorPagination.is_requested(request)
+
+        # Searches without an explicit ordering are ranked by relevance
+        rank_ordering = (
+            bool(search) and "ordering" not in request.query_params and not cursor_mode
+        )
 
         # Ensure that only valid fields are used for ordering
-        valid_ordering_fields = [
-            "company_name",
-            "description",
-            "number_of_employees",
-        ]
-        if ordering.lstrip("-") not in valid_ordering_fields:
+        if ordering.lstrip("-") not in ORDERING_FIELDS:
             raise ValidationError(
                 {
-                    "error": f"Invalid ordering field. Valid fields are: {', '.join(valid_ordering_fields)}."
+                    "error": f"Invalid ordering field. Valid fields are: {', '.join(ORDERING_FIELDS)}."
                 }
             )
 
-        # Apply ordering
-        companies = companies.order_by(ordering)
+        return {
+            "ordering": ordering,
+            "fields": fields,
+            "search": search,
+            "cursor_mode": cursor_mode,
+            "rank_ordering": rank_ordering,
+        }
 
-        # Paginate the companies
-        paginator = CompanyPagination()
-        paginated_companies = paginator.paginate_queryset(companies, request)
+    def get_cache_params(self, request, params):
+        """
+        Return the request parameters the cached page depends on.
+        """
+        return {
+            # The pagination links are absolute URLs
+            "scheme": request.scheme,
+            "host": request.get_host(),
+            "ordering": "-rank" if params["rank_ordering"] else params["ordering"],
+            "search": params["search"],
+            "fields": ",".join(params["fields"]),
+            **{
+                name: request.query_params.get(name, "")
+                for name in ("page", "page_size", "pagination", "cursor")
+            },
+        }
+
+    def get_page_queryset(self, request, params):
+        """
+        Build the (lazy) queryset of the user's companies and its paginator.
+
+        Returns:
+            tuple: The `values()` queryset and the paginator to apply to it.
+        """
+
+        # Get all companies owned by the authenticated user
+        companies = Company.objects.filter(owner=request.user)
+        ordering, search = params["ordering"], params["search"]
+
+        # Only fetch the requested columns, plus what the ETag and the cursor need
+        columns = dict.fromkeys(
+            ["id", "version", ordering.lstrip("-"), *params["fields"]]
+        )
+        companies = companies.values(*columns)
+
+        # Narrow the companies down with the full-text index
+        if search:
+            query = SearchQuery(search, search_type="websearch", config=SEARCH_CONFIG)
+            companies = companies.filter(search_vector=query)
+
+        # Paginate the companies, cursor mode applies the ordering itself
+        if params["cursor_mode"]:
+            paginator = CompanyCursorPagination(ordering)
+        elif params["rank_ordering"]:
+            # Most relevant first, the id keeps equally ranked rows stable
+            companies = companies.annotate(
+                rank=SearchRank(F("search_vector"), query)
+            ).order_by("-rank", "id")
+            paginator = CompanyPagination()
+        else:
+            # The id tiebreaker keeps pages stable and matches the composite indexes
+            tiebreaker = "-id" if ordering.startswith("-") else "id"
+            companies = companies.order_by(ordering, tiebreaker)
+            paginator = CompanyPagination()
+
+        return companies, paginator
+
+    def get_page_response(self, request, paginator, paginated_companies, params):
+        """
+        Build the response of a fetched page, or a 304 if the client's copy
+        is still current.
+        """
+        fields = params["fields"]
+
+        # The ETag only needs the page envelope and the row versions, so a
+        # matching If-None-Match is answered without serializing anything
+        envelope = paginator.get_paginated_response(None).data
+        del envelope["results"]
+        etag = get_list_etag(envelope, paginated_companies, fields)
+        if if_none_match(request, etag):
+            return not_modified(etag)
 
-        # Serialize the data, send JSON format as a response
-        serializer = CompanyListSerializer(paginated_companies, many=True)
+        # Serialize the rows directly, skipping the serializer field machinery
+        data = CompanyListSerializer.serialize_rows(paginated_companies, fields)
 
         # Return paginated response
-        return paginator.get_paginated_response(serializer.data)
+        response = paginator.get_paginated_response(data)
+        response["ETag"] = etag
+
+        return response
+
+
+class ExportUserCompaniesView(APIView):
+    """
+    A view for streaming all companies owned by the authenticated user as
+    NDJSON or CSV, chosen by the Accept header.
+
+    Attributes:
+        permission_classes (list): Permissions to access the view (authenticated users only).
+        renderer_classes (list): The supported export formats, NDJSON is the default.
+        chunk_size (int): The number of rows fetched from the database at a time.
+    """
+
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+    chunk_size = 2000
+
+    @swagger_auto_schema(
+        operation_description="Stream all companies owned by the authenticated user as NDJSON (application/x-ndjson) or CSV (text/csv).",
+        responses={
+            200: "Streamed export of the companies.",
+            406: "Unsupported Accept header.",
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        """
+        Streams the companies with constant memory, regardless of their number.
 
+        Rows are read with a server-side cursor in chunks and encoded as they
+        are sent, so neither the queryset nor the response body is ever held
+        in memory as a whole.
 
-class RetrieveUserCompanyView(RetrieveAPIView):
+        This only holds under WSGI. Under ASGI Django buffers a synchronous
+        stream, so ASGI deployments have to enable ASYNC_VIEWS, which serves
+        exports with the async view of `company.async_views`.
+
+        Args:
+            request (Request): The HTTP request object.
+
+        Returns:
+            StreamingHttpResponse: The streamed export.
+        """
+
+        rows = self.get_export_queryset(request).iterator(chunk_size=self.chunk_size)
+        return self.get_export_response(
+            request.accepted_renderer.stream(rows, CompanyListSerializer.Meta.fields)
+        )
+
+    def get_export_queryset(self, request):
+        # Same ownership filter and field set as the list endpoint, ordered
+        # along the (owner, company_name, id) index so no sort is needed
+        return (
+            Company.objects.filter(owner=request.user)
+            .order_by("company_name", "id")
+            .values_list(*CompanyListSerializer.Meta.fields)
+        )
+
+    def get_export_response(self, content):
+        """
+        Wrap the encoded export in a streaming response.
+        """
+        renderer = self.request.accepted_renderer
+        response = StreamingHttpResponse(
+            content,
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="companies.{renderer.format}"'
+        )
+        return response
+
+
+class OwnerStatsView(APIView):
+    """
+    A view for the company statistics of the authenticated user.
+
+    The statistics are maintained incrementally by the database on every
+    company write, so serving them is a single primary key lookup.
+
+    Attributes:
+        permission_classes (list): Permissions to access the view (authenticated users only).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="A view for the company statistics of the authenticated user.",
+        responses={200: OwnerStatsSerializer},
+    )
+    def get(self, request, *args, **kwargs):
+        """
+        Return the company count and the total and average number of employees.
+
+        Args:
+            request (Request): The HTTP request object.
+
+        Returns:
+            Response: The statistics, all zero for users without companies.
+        """
+        stats = OwnerStats.objects.filter(owner_id=request.user.id).first()
+        if stats is None:
+            stats = OwnerStats(owner_id=request.user.id)
+
+        serializer = OwnerStatsSerializer(stats)
+        return Response(serializer.data)
+
+
+class RetrieveUserCompanyView(ReplicaReadMixin, RetrieveAPIView):
     """
     A view to retrieve a specific company record owned by the authenticated user.
 
     Attributes:
         serializer_class (CompanyListSerializer): Serializer used for retrieving company details.
         permission_classes (list): Permissions to access the view (authenticated users only).
+        renderer_classes (list): JSON is encoded by the byte-identical FastJSONRenderer.
     """
 
     queryset = Company.objects.none()
     serializer_class = CompanyListSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
 
     @swagger_auto_schema(
         operation_description="A view to retrieve a specific company record owned by the authenticated user.",
+        manual_parameters=[FIELDS_PARAMETER],
         responses={
             200: "Company details retrieved successfully.",
+            304: "Not modified since the If-None-Match ETag.",
             404: "We couldn’t find the company, or it’s not associated with your account.",
         },
     )
@@ -221,19 +977,60 @@ class RetrieveUserCompanyView(RetrieveAPIView):
         """
         Retrieve the company record owned by the user.
         """
+        fields = CompanyListSerializer.parse_fields(request.query_params.get("fields"))
+        cache_key = make_cache_key(
+            request.user.id, "detail", pk=self.kwargs["pk"], fields=",".join(fields)
+        )
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            return respond_from_cache(request, cached)
+
         try:
-            company = Company.objects.get(id=self.kwargs["pk"], owner=request.user)
+            company = self.get_company_queryset(fields).get()
         except Company.DoesNotExist:
-            raise NotFound(
-                {
-                    "error": "We couldn’t find the company, or it’s not associated with your account."
-                }
+            raise self.not_found()
+
+        response = self.get_company_response(request, company, fields)
+        if response.status_code == status.HTTP_200_OK:
+            set_cached_response(
+                cache_key, {"etag": response["ETag"], "data": response.data}
             )
 
+        return response
+
+    def get_company_queryset(self, fields):
+        """
+        Return the (lazy) queryset of the requested company, if the user owns it.
+        """
+        return Company.objects.values("id", "version", *fields).filter(
+            id=self.kwargs["pk"], owner=self.request.user
+        )
+
+    def not_found(self):
+        """
+        Return the error for a missing company or one owned by someone else.
+        """
+        return NotFound(
+            {
+                "error": "We couldn’t find the company, or it’s not associated with your account."
+            }
+        )
+
+    def get_company_response(self, request, company, fields):
+        """
+        Build the response of a fetched company row, or a 304 if the client's
+        copy is still current.
+        """
+
+        # Answer conditional requests from the row version alone
+        etag = get_company_etag(Company(id=company["id"], version=company["version"]))
+        if if_none_match(request, etag):
+            return not_modified(etag)
+
         # If company is found and belongs to the user, return the response
-        serializer = self.get_serializer(company)
+        data = CompanyListSerializer.serialize_rows([company], fields)[0]
 
-        return Response(serializer.data)
+        return Response(data, headers={"ETag": etag})
 
 
 class UpdateCompanyView(UpdateAPIView):
@@ -266,16 +1063,79 @@ class UpdateCompanyView(UpdateAPIView):
         try:
             company = Company.objects.get(id=self.kwargs["pk"])
         except Company.DoesNotExist:
+            company = None
+
+        return self.check_object(company)
+
+    def check_object(self, company):
+        """
+        Validate that the fetched company exists and is owned by the user.
+
+        Raises:
+            PermissionDenied: If the authenticated user does not own the company.
+            NotFound: If the company record does not exist.
+
+        Returns:
+            Company: The company object owned by the authenticated user.
+        """
+        if company is None:
             raise NotFound({"error": "Company not found."})
 
         # Ensure the user can only update their own company
-        if company.owner != self.request.user:
+        if company.owner_id != self.request.user.id:
             raise PermissionDenied(
                 {"error": "You do not have permission to update this company."}
             )
 
         return company
 
+    def perform_update(self, serializer):
+        """
+        Applies the update with a single `UPDATE ... WHERE id AND owner_id`.
+
+        The ownership check and the write happen in one round trip. Only when
+        no row was updated is the company looked up again, to tell a missing
+        company (404) from someone else's company (403) and from a stale
+        If-Match version (412).
+
+        Raises:
+            NotFound: If the company record does not exist.
+            PermissionDenied: If the authenticated user does not own the company.
+            PreconditionFailed: If the row changed since the client fetched it.
+        """
+        companies, versions = self.get_update_queryset()
+        updated = companies.update(
+            **serializer.validated_data, version=F("version") + 1
+        )
+        if not updated:
+            # Raises 404 or 403, otherwise only the version did not match
+            self.get_object()
+            raise PreconditionFailed()
+
+        self.set_updated_etag(versions)
+        invalidate_owner_cache(self.request.user.id)
+
+    def get_update_queryset(self):
+        """
+        Return the queryset to update and the If-Match versions, if any.
+        """
+        pk = self.kwargs["pk"]
+        companies = Company.objects.filter(id=pk, owner_id=self.request.user.id)
+
+        # With If-Match, only update the row versions the client has seen
+        versions = get_if_match_versions(self.request, pk)
+        if versions is not None:
+            companies = companies.filter(version__in=versions)
+
+        return companies, versions
+
+    def set_updated_etag(self, versions):
+        # The new version is only known exactly for a single If-Match version
+        if versions is not None and len(versions) == 1:
+            self.etag = get_company_etag(
+                Company(id=self.kwargs["pk"], version=versions[0] + 1)
+            )
+
     @swagger_auto_schema(
         operation_description="Partially update the number of employees in a company record.",
         request_body=CompanyUpdateSerializer,
@@ -284,6 +1144,7 @@ class UpdateCompanyView(UpdateAPIView):
             400: "Invalid request body or data.",
             403: "Permission denied.",
             404: "Company not found.",
+            412: "The company was modified since the If-Match ETag was issued.",
         },
     )
     def patch(self, request, *args, **kwargs):
@@ -300,30 +1161,197 @@ class UpdateCompanyView(UpdateAPIView):
             Response: If the request body is empty or contains invalid fields.
         """
 
-        # First, check permissions by calling `get_object`
-        self.get_object()
+        try:
+            serializer = self.validate_body(request)
+        except ValidationError:
+            # Permission errors take precedence over request body errors
+            self.get_object()
+            raise
+
+        # Perform partial update on the database relation, the ownership check
+        # is part of the UPDATE statement
+        self.etag = None
+        self.perform_update(serializer)
+
+        return self.get_success_response()
+
+    def validate_body(self, request):
+        """
+        Validate the request body.
+
+        Returns:
+            Serializer: The validated serializer.
+
+        Raises:
+            ValidationError: If the body is empty, contains other fields than
+                             'number_of_employees' or is invalid.
+        """
 
         # Validate if the request has a JSON body
         if not request.data:
-            return Response(
-                {"error": "Request body is empty. Please provide valid data."},
-                status=status.HTTP_400_BAD_REQUEST,
+            raise ValidationError(
+                {"error": "Request body is empty. Please provide valid data."}
             )
 
         # Validate if the request contains only the allowed field 'number_of_employees'
         if "number_of_employees" not in request.data:
-            return Response(
-                {"error": "Only 'number_of_employees' field can be updated."},
-                status=status.HTTP_400_BAD_REQUEST,
+            raise ValidationError(
+                {"error": "Only 'number_of_employees' field can be updated."}
             )
 
-        # Perform partial update on the database relation
-        super().patch(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        return serializer
 
+    def get_success_response(self):
         # Return success message
         return Response(
             {
                 "message": "Company updated successfully.",
             },
             status=status.HTTP_200_OK,
+            headers={"ETag": self.etag} if self.etag else None,
+        )
+
+
+class BulkUpdateCompaniesView(APIView):
+    """
+    A view for updating the number of employees of many companies at once.
+
+    Attributes:
+        permission_classes (list): Permissions to access the view (authenticated users only).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Update the number of employees of many companies owned by the user at once.",
+        request_body=CompanyBatchUpdateSerializer(many=True),
+        responses={
+            200: "All companies updated successfully.",
+            207: "Some companies were updated, see the per-item results.",
+            400: "No company was updated, see the per-item results.",
+            415: "Invalid content type.",
+        },
+    )
+    def patch(self, request, *args, **kwargs):
+        """
+        Validates every item, checks the ownership of all ids with one query and
+        applies the valid changes with a single CASE-based UPDATE.
+
+        Items that are invalid, duplicated, missing or owned by someone else are
+        reported as failed without aborting the rest of the batch.
+
+        Args:
+            request (Request): The HTTP request object.
+
+        Returns:
+            Response: The per-item results with the matching status code.
+        """
+
+        # Check if the Content-Type is application/json
+        if "application/json" not in request.content_type:
+            return Response(
+                {"error": "Invalid content type. Please provide a JSON array."},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        # Check if the request data is a non-empty array of a sane size
+        if not isinstance(request.data, list) or not request.data:
+            return Response(
+                {"error": "Request body must be a non-empty JSON array."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(request.data) > MAX_BULK_UPDATE_ITEMS:
+            return Response(
+                {
+                    "error": f"A single request can update at most {MAX_BULK_UPDATE_ITEMS} companies."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Validate every item on its own, so errors can be reported per item
+        serializer = CompanyBatchUpdateSerializer(data=request.data, many=True)
+        failed = []
+        changes = {}
+        for index, item in enumerate(request.data):
+            try:
+                data = serializer.child.run_validation(item)
+            except ValidationError as e:
+                failed.append({"index": index, "status": "failed", "errors": e.detail})
+                continue
+
+            if data["id"] in changes:
+                failed.append(
+                    {
+                        "index": index,
+                        "id": data["id"],
+                        "status": "failed",
+                        "errors": {"error": "Duplicate company id in the batch."},
+                    }
+                )
+                continue
+            changes[data["id"]] = (index, data["number_of_employees"])
+
+        # Verify the ownership of all ids with a single query
+        owners = dict(
+            Company.objects.filter(id__in=changes).values_list("id", "owner_id")
+        )
+        for pk, (index, _) in list(changes.items()):
+            if pk not in owners:
+                error = "Company not found."
+            elif owners[pk] != request.user.id:
+                error = "You do not have permission to update this company."
+            else:
+                continue
+            del changes[pk]
+            failed.append(
+                {
+                    "index": index,
+                    "id": pk,
+                    "status": "failed",
+                    "errors": {"error": error},
+                }
+            )
+
+        # Apply all changes with one UPDATE ... SET number_of_employees = CASE ...
+        if changes:
+            Company.objects.filter(id__in=changes, owner_id=request.user.id).update(
+                number_of_employees=Case(
+                    *[
+                        When(id=pk, then=Value(number_of_employees))
+                        for pk, (_, number_of_employees) in changes.items()
+                    ],
+                    default=F("number_of_employees"),
+                    output_field=PositiveIntegerField(),
+                ),
+                version=F("version") + 1,
+            )
+            invalidate_owner_cache(request.user.id)
+
+        results = failed + [
+            {
+                "index": index,
+                "id": pk,
+                "status": "updated",
+                "number_of_employees": number_of_employees,
+            }
+            for pk, (index, number_of_employees) in changes.items()
+        ]
+        results.sort(key=lambda result: result["index"])
+
+        if not changes:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif failed:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_200_OK
+
+        return Response(
+            {
+                "updated": len(changes),
+                "failed": len(failed),
+                "results": results,
+            },
+            status=response_status,
         )
@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "company_app.settings")
 
 application = get_asgi_application()
+
+# Generate the OpenAPI schema at startup instead of on the first request
+if settings.OPENAPI_SCHEMA_WARMUP:
+    from .swagger import warm_schema_cache
+
+    warm_schema_cache()
@@ -0,0 +1,178 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .profiling import phase
+
+# Claims copied from the user into every issued token
+USER_CLAIMS = ("username", "email", "is_staff", "is_superuser")
+
+
+class UserCache:
+    """
+    A thread-safe, size-bounded LRU cache of users with a time to live.
+
+    Attributes:
+        max_size (int): The maximum number of cached users, the least recently
+                        used one is evicted first.
+        ttl (float): The number of seconds a cached user stays valid.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        """
+        Return the cached user, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        """
+        Cache the user, evicting the least recently used entries when full.
+        """
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        """
+        Drop the cached user, if any.
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        """
+        Drop all cached users.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(settings.JWT_USER_CACHE_SIZE, settings.JWT_USER_CACHE_TTL)
+
+
+def add_user_claims(token, user):
+    """
+    Copy the user fields needed by the `claims` lookup mode into the token.
+
+    Args:
+        token (Token): The refresh token, access tokens derived from it inherit the claims.
+        user (User): The user the token is issued for.
+    """
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Signal handler dropping a changed, deactivated or deleted user from the cache.
+    """
+    user_cache.invalidate(instance.pk)
+
+
+post_save.connect(
+    invalidate_cached_user,
+    sender=settings.AUTH_USER_MODEL,
+    dispatch_uid="invalidate_cached_user_on_save",
+)
+post_delete.connect(
+    invalidate_cached_user,
+    sender=settings.AUTH_USER_MODEL,
+    dispatch_uid="invalidate_cached_user_on_delete",
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that avoids loading the user from the database on
+    every request.
+
+    The lookup is configured with the JWT_USER_LOOKUP setting:
+        db: Load the user from the database on every request (stock behaviour).
+        cache: Keep users in a bounded per-process LRU cache with a TTL and only
+               hit the database on a miss. Saving or deleting a user drops it
+               from the cache of the current process, other processes pick the
+               change up when the entry expires.
+        claims: Build the user from the token claims, without ever touching the
+                database. Changes to the user only take effect once the token
+                is reissued, tokens without the user claims are rejected.
+    """
+
+    def authenticate(self, request):
+        """
+        Decode the token and resolve its user, timed as the `auth` phase.
+        """
+        with phase("auth"):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        """
+        Return the user of the validated token according to JWT_USER_LOOKUP.
+        """
+        mode = settings.JWT_USER_LOOKUP
+        if mode == "db":
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        user = user_cache.get(user_id)
+        if user is None:
+            if mode == "claims":
+                user = self.get_user_from_claims(user_id, validated_token)
+            else:
+                user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+
+        # Hand out a copy, so nothing set on it leaks into other requests
+        return copy.copy(user)
+
+    def get_user_from_claims(self, user_id, validated_token):
+        """
+        Build a user instance from the token claims alone.
+
+        The instance behaves like a user loaded from the database, e.g. it can
+        be assigned to foreign keys and its related managers can be queried.
+
+        Raises:
+            InvalidToken: If the token was issued without the user claims.
+        """
+        try:
+            fields = {claim: validated_token[claim] for claim in USER_CLAIMS}
+        except KeyError:
+            raise InvalidToken("Token contained no user claims, please log in again")
+
+        user_model = get_user_model()
+        user = user_model(
+            **{api_settings.USER_ID_FIELD: user_id}, is_active=True, **fields
+        )
+        user._state.adding = False
+        user._state.db = user_model.objects.db
+
+        return user
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.cache import cache
+
+
+def get_failures_key(user_id):
+    """
+    Return the cache key counting the failed logins of a user.
+    """
+    return f"login:failures:{user_id}"
+
+
+def is_locked_out(user_id):
+    """
+    Return True if the user has too many recent failed logins.
+    """
+    failures = cache.get(get_failures_key(user_id), 0)
+    return failures >= settings.LOGIN_MAX_FAILED_ATTEMPTS
+
+
+def register_failure(user_id):
+    """
+    Count a failed login of the user.
+
+    The counter expires LOGIN_LOCKOUT_SECONDS after the first failure, which
+    also ends the lockout.
+    """
+    key = get_failures_key(user_id)
+    cache.add(key, 0, timeout=settings.LOGIN_LOCKOUT_SECONDS)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The counter expired between add() and incr()
+        cache.set(key, 1, timeout=settings.LOGIN_LOCKOUT_SECONDS)
+
+
+def reset_failures(user_id):
+    """
+    Forget the failed logins of the user after a successful login.
+    """
+    cache.delete(get_failures_key(user_id))
@@ -0,0 +1,136 @@
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# The request being handled, its URL name is used as the `view` label
+current_request = ContextVar("current_request", default=None)
+
+
+class Histogram:
+    """
+    A thread-safe histogram with a single `view` label, rendered in the
+    Prometheus text exposition format.
+
+    Attributes:
+        name (str): The metric name.
+        documentation (str): The HELP text of the metric.
+        buckets (tuple): The sorted upper bounds of the buckets, +Inf is implied.
+    """
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, view, value):
+        """
+        Record a value for the given view.
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(view)
+            if series is None:
+                # One count per bucket plus +Inf, then the sum of the values
+                series = self._series[view] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def clear(self):
+        """
+        Drop all recorded values.
+        """
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """
+        Return the metric in the Prometheus text exposition format.
+        """
+        with self._lock:
+            series = {view: list(values) for view, values in self._series.items()}
+
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        bounds = [format_float(bound) for bound in self.buckets] + ["+Inf"]
+        for view in sorted(series):
+            values = series[view]
+            label = f'view="{escape_label(view)}"'
+            cumulative = 0
+            for bound, count in zip(bounds, values[:-1]):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {format_float(values[-1])}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def format_float(value):
+    """
+    Format a number the way Prometheus clients do, e.g. 1.0 and 0.005.
+    """
+    return repr(float(value))
+
+
+def escape_label(value):
+    """
+    Escape a label value for the text exposition format.
+    """
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling a request, by URL name.",
+    LATENCY_BUCKETS,
+)
+db_queries = Histogram(
+    "db_queries_per_request",
+    "Number of SQL queries issued by a request, by URL name.",
+    (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds_per_request",
+    "Total time spent in SQL queries by a request, by URL name.",
+    LATENCY_BUCKETS,
+)
+email_queue_duration = Histogram(
+    "email_queue_duration_seconds",
+    "Time a request spent queueing an email in the outbox, by URL name.",
+    LATENCY_BUCKETS,
+)
+
+REGISTRY = (request_duration, db_queries, db_query_duration, email_queue_duration)
+
+
+def get_view_label(request):
+    """
+    Return the `view` label of a request: its URL name, or `<unresolved>` for
+    requests that matched no URL, which keeps the set of labels bounded.
+    """
+    match = request.resolver_match
+    if match is None:
+        return "<unresolved>"
+    return match.view_name or "<unnamed>"
+
+
+def observe_email_queue(duration):
+    """
+    Record the time spent queueing an email under the view of the current
+    request. Emails are sent by the outbox worker, outside of any request.
+    """
+    request = current_request.get()
+    if request is not None:
+        email_queue_duration.observe(get_view_label(request), duration)
+
+
+def render_metrics():
+    """
+    Return all metrics in the Prometheus text exposition format.
+    """
+    return "".join(metric.render() for metric in REGISTRY)
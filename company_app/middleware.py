@@ -0,0 +1,329 @@
+import gzip
+import re
+import secrets
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import StreamingBuffer, compress_string
+
+from . import metrics
+from .profiling import (
+    RequestProfile,
+    current_profile,
+    install_query_hook,
+    query_observers,
+)
+
+# Media types worth compressing, anything else (images, archives) is already dense
+COMPRESSIBLE_TYPES = re.compile(
+    r"^(text/|application/(json|x-ndjson|javascript|xml|[\w.-]+\+(json|xml))\b)"
+)
+
+
+def accepts_gzip(header):
+    """
+    Return True if an Accept-Encoding header value allows gzip.
+
+    Honours quality values, so `gzip;q=0` is a refusal, and falls back to
+    the `*` wildcard when gzip is not listed.
+
+    Args:
+        header (str): The value of the Accept-Encoding header.
+    """
+    gzip_quality = wildcard_quality = None
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        if coding in ("gzip", "x-gzip"):
+            gzip_quality = quality
+        elif coding == "*":
+            wildcard_quality = quality
+
+    if gzip_quality is not None:
+        return gzip_quality > 0
+    return bool(wildcard_quality)
+
+
+class GzipStream:
+    """
+    Incremental gzip encoder for streamed responses.
+
+    Every chunk is flushed through the compressor, so the client receives
+    it right away instead of once zlib's internal buffer fills up.
+
+    Attributes:
+        max_random_bytes (int): The upper bound of the random header padding
+                                that mitigates BREACH style attacks.
+    """
+
+    def __init__(self, max_random_bytes):
+        self.buffer = StreamingBuffer()
+        filename = (
+            b"a" * secrets.randbelow(max_random_bytes) if max_random_bytes else None
+        )
+        self.file = gzip.GzipFile(
+            filename=filename, mode="wb", compresslevel=6, fileobj=self.buffer, mtime=0
+        )
+
+    def compress(self, chunk):
+        """
+        Compress a chunk and return the bytes that are ready to be sent.
+        """
+        if chunk:
+            self.file.write(chunk)
+            self.file.flush()
+        return self.buffer.read()
+
+    def close(self):
+        """
+        Finish the stream and return its trailing bytes.
+        """
+        self.file.close()
+        return self.buffer.read()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Negotiated gzip compression of text responses.
+
+    Differs from Django's GZipMiddleware in that:
+        - The minimum body size is the COMPRESSION_MIN_SIZE setting.
+        - Accept-Encoding quality values are honoured.
+        - Only text like media types (JSON, NDJSON, CSV, HTML, ...) are compressed.
+        - Streamed responses are flushed chunk by chunk, with a single gzip
+          stream for async responses too.
+        - `Vary: Accept-Encoding` is also set on responses below the size
+          threshold, since other responses for the same URL may be compressed.
+
+    Like GZipMiddleware, strong ETags are made weak, but on every response to
+    a client accepting gzip, compressed or not. Otherwise a 304, or a body too
+    small to compress, would carry the strong form of the ETag the compressed
+    200 for the same resource sends as weak.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+
+    def process_response(self, request, response):
+        # A 304 has no Content-Type, but stands in for one of the API's text
+        # responses, so it gets the same Vary and ETag
+        not_modified = response.status_code == 304
+
+        # Avoid compressing twice, or compressing dense media types
+        if response.has_header("Content-Encoding") or not (
+            not_modified or COMPRESSIBLE_TYPES.match(response.get("Content-Type", ""))
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        if not accepts_gzip(request.META.get("HTTP_ACCEPT_ENCODING", "")):
+            return response
+
+        # The compressed variant is not byte-identical to the uncompressed one,
+        # so a strong ETag becomes weak (RFC 9110 Section 8.8.1), whether this
+        # particular response ends up compressed or not
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+
+        # There's no body to compress, or it's not worth compressing
+        if not_modified or (
+            not response.streaming and len(response.content) < self.min_size
+        ):
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.acompress_sequence(
+                    response.streaming_content
+                )
+            else:
+                response.streaming_content = self.compress_sequence(
+                    response.streaming_content
+                )
+            # The compressed size is unknown until the stream ends
+            del response.headers["Content-Length"]
+        else:
+            # Return the compressed content only if it's actually shorter
+            compressed_content = compress_string(
+                response.content, max_random_bytes=self.max_random_bytes
+            )
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers["Content-Length"] = str(len(response.content))
+
+        response.headers["Content-Encoding"] = "gzip"
+
+        return response
+
+    def compress_sequence(self, chunks):
+        stream = GzipStream(self.max_random_bytes)
+        for chunk in chunks:
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.close()
+
+    async def acompress_sequence(self, chunks):
+        stream = GzipStream(self.max_random_bytes)
+        async for chunk in chunks:
+            data = stream.compress(chunk)
+            if data:
+                yield data
+        yield stream.close()
+
+
+class InstrumentationMiddleware:
+    """
+    Base of the middlewares timing requests, usable in both sync (WSGI) and
+    async (ASGI) stacks, so they never force a thread per request.
+
+    Subclasses implement `begin(request)`, which sets up the request's
+    context variables and returns what `end` needs to reset them, and
+    `finish(request, response, state, duration)`.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        install_query_hook()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        state = self.begin(request)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duration = time.perf_counter() - start
+            self.end(state)
+        return self.finish(request, response, state, duration)
+
+    async def __acall__(self, request):
+        state = self.begin(request)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            duration = time.perf_counter() - start
+            self.end(state)
+        return self.finish(request, response, state, duration)
+
+    def observe_queries(self, observer):
+        """
+        Register a (sql, seconds) query observer for the current request.
+
+        Returns:
+            Token: The token resetting the observers in `end`.
+        """
+        return query_observers.set(query_observers.get() + (observer,))
+
+
+class MetricsMiddleware(InstrumentationMiddleware):
+    """
+    Records per-view request latency, SQL query count and SQL time into the
+    in-process histograms of `company_app.metrics`.
+
+    Requests are labelled by their resolved URL name, requests that resolve
+    to no URL share the `<unresolved>` label to keep the label set bounded.
+    Queries are counted by a database execute wrapper, so the overhead is a
+    couple of clock reads per query. The middleware is disabled when no
+    METRICS_TOKEN is configured, since the metrics couldn't be scraped.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_TOKEN:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def begin(self, request):
+        # Query count and total query time of this request
+        queries = [0, 0.0]
+
+        def record_query(sql, duration):
+            queries[0] += 1
+            queries[1] += duration
+
+        tokens = (
+            metrics.current_request.set(request),
+            self.observe_queries(record_query),
+        )
+        return queries, tokens
+
+    def end(self, state):
+        request_token, observers_token = state[1]
+        query_observers.reset(observers_token)
+        metrics.current_request.reset(request_token)
+
+    def finish(self, request, response, state, duration):
+        view = metrics.get_view_label(request)
+        queries = state[0]
+        metrics.request_duration.observe(view, duration)
+        metrics.db_queries.observe(view, queries[0])
+        metrics.db_query_duration.observe(view, queries[1])
+        return response
+
+
+class ProfilingMiddleware(InstrumentationMiddleware):
+    """
+    Per-request phase timing (`db`, `auth`, `template`, `email`).
+
+    With SERVER_TIMING enabled the phases are sent in a `Server-Timing`
+    header, which browser developer tools display next to the request.
+    Requests slower than SLOW_REQUEST_THRESHOLD_MS have their full SQL trace
+    written to the slow request log.
+
+    The middleware is removed from the stack when both features are off, so
+    the `phase` timers then cost a single context variable lookup.
+    """
+
+    def __init__(self, get_response):
+        self.server_timing = settings.SERVER_TIMING
+        self.threshold = settings.SLOW_REQUEST_THRESHOLD_MS / 1000
+        if not self.server_timing and not self.threshold:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def begin(self, request):
+        profile = RequestProfile(trace=bool(self.threshold))
+        tokens = (
+            current_profile.set(profile),
+            self.observe_queries(profile.record_query),
+        )
+        return profile, tokens
+
+    def end(self, state):
+        profile_token, observers_token = state[1]
+        query_observers.reset(observers_token)
+        current_profile.reset(profile_token)
+
+    def finish(self, request, response, state, duration):
+        profile = state[0]
+        if self.server_timing:
+            response.headers["Server-Timing"] = profile.get_server_timing(duration)
+        if self.threshold and duration >= self.threshold:
+            profile.log_trace(request, response.status_code, duration)
+        return response
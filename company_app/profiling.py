@@ -0,0 +1,179 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+# The profile of the request being handled, None when profiling is disabled
+current_profile = ContextVar("current_profile", default=None)
+
+# Callbacks receiving the (sql, seconds) of every query of the current request
+query_observers = ContextVar("query_observers", default=())
+
+logger = logging.getLogger("company_app.slow_requests")
+
+
+def observe_queries(execute, sql, params, many, context):
+    """
+    Database execute wrapper timing every query for the `query_observers`.
+
+    The observers live in a context variable, which follows the request into
+    the threads `sync_to_async` runs the ORM in, so queries of async views are
+    observed as well.
+    """
+    observers = query_observers.get()
+    if not observers:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        for observer in observers:
+            observer(sql, duration)
+
+
+def add_query_hook(sender=None, connection=None, **kwargs):
+    """
+    Install `observe_queries` on a connection, once.
+    """
+    if observe_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(observe_queries)
+
+
+def install_query_hook():
+    """
+    Install `observe_queries` on the connections of this thread and on every
+    connection opened from now on, in any thread.
+    """
+    connection_created.connect(add_query_hook, dispatch_uid="company_app_query_hook")
+    for connection in connections.all(initialized_only=True):
+        add_query_hook(connection=connection)
+
+
+class RequestProfile:
+    """
+    Time spent per phase of a single request.
+
+    Phases may nest, e.g. the queries loading the user are counted in both
+    `auth` and `db`.
+
+    Attributes:
+        phases (dict): [total seconds, number of calls] keyed by phase name.
+        queries (list): The (sql, seconds) of every statement, or None when
+                        the SQL trace is not collected.
+    """
+
+    def __init__(self, trace=False):
+        self.phases = {}
+        self.queries = [] if trace else None
+
+    def add(self, name, duration):
+        """
+        Add a duration to a phase.
+        """
+        entry = self.phases.get(name)
+        if entry is None:
+            self.phases[name] = [duration, 1]
+        else:
+            entry[0] += duration
+            entry[1] += 1
+
+    def record_query(self, sql, duration):
+        """
+        Query observer adding a statement to the `db` phase and the trace.
+        """
+        self.add("db", duration)
+        if self.queries is not None:
+            self.queries.append((sql, duration))
+
+    def get_server_timing(self, total):
+        """
+        Build the Server-Timing header value, durations in milliseconds.
+
+        Args:
+            total (float): The duration of the whole request in seconds.
+        """
+        metrics = []
+        for name, (duration, count) in self.phases.items():
+            metric = f"{name};dur={duration * 1000:.2f}"
+            if name == "db":
+                metric += f';desc="{count} {"query" if count == 1 else "queries"}"'
+            elif count > 1:
+                metric += f';desc="{count} calls"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+    def get_duplicates(self):
+        """
+        Return the statements executed more than once, most repeated first.
+
+        Statements are compared without their parameters, so the same query
+        run in a loop (N+1) shows up even with different values.
+        """
+        counts = Counter(sql for sql, _ in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count > 1]
+
+    def log_trace(self, request, status, total):
+        """
+        Write the SQL trace of a slow request to the slow request log.
+
+        Only the statements are logged, never their parameters, which may
+        contain personal data or password hashes.
+        """
+        view = request.resolver_match.view_name if request.resolver_match else ""
+        db_time = sum(duration for _, duration in self.queries)
+        duplicates = self.get_duplicates()
+
+        lines = [
+            f"Slow request: {request.method} {request.path} ({view or '-'}) "
+            f"{status} in {total * 1000:.1f} ms, {len(self.queries)} queries in "
+            f"{db_time * 1000:.1f} ms, {sum(count for _, count in duplicates)} "
+            "duplicated"
+        ]
+        for name, (duration, count) in self.phases.items():
+            lines.append(f"  phase {name}: {duration * 1000:.2f} ms over {count}")
+        for index, (sql, duration) in enumerate(self.queries, 1):
+            lines.append(f"  {index:>4}. {duration * 1000:>9.3f} ms  {sql}")
+        for sql, count in duplicates:
+            lines.append(f"  duplicate x{count}: {sql}")
+
+        logger.warning("\n".join(lines))
+
+
+class phase:
+    """
+    Context manager timing a phase of the current request.
+
+    Costs a single context variable lookup when profiling is disabled.
+
+    Args:
+        name (str): The phase name, used as the Server-Timing metric name.
+    """
+
+    __slots__ = ("name", "profile", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.profile = current_profile.get()
+        if self.profile is not None:
+            self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        if self.profile is not None:
+            self.profile.add(self.name, time.perf_counter() - self.start)
+
+
+def record_phase(name, duration):
+    """
+    Add an already measured duration to a phase of the current request.
+    """
+    profile = current_profile.get()
+    if profile is not None:
+        profile.add(name, duration)
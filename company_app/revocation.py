@@ -0,0 +1,135 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from company.models import RevokedToken
+
+
+class BloomFilter:
+    """
+    A fixed-size Bloom filter over strings.
+
+    Membership tests can return false positives at roughly the configured
+    rate, but never false negatives.
+
+    Attributes:
+        size (int): The number of bits in the filter.
+        hash_count (int): The number of bit positions set per item.
+    """
+
+    def __init__(self, capacity, false_positive_rate):
+        capacity = max(capacity, 1)
+        self.size = max(
+            int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2), 8
+        )
+        self.hash_count = max(round(self.size / capacity * math.log(2)), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        # Double hashing derives all positions from one 128 bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:], "big") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class RevocationStore:
+    """
+    Revocation store for refresh tokens, keyed by their `jti` claim.
+
+    An in-process Bloom filter answers "not revoked" for the vast majority of
+    tokens without a query. Only when the filter reports a possible match is
+    the database asked for the exact answer. Revoking inserts the row under a
+    unique key, so a token rotated concurrently in another process is still
+    detected exactly.
+
+    The filter is rebuilt from the database every
+    REFRESH_TOKEN_REVOCATION_REBUILD_INTERVAL seconds, after expired rows have
+    been deleted, which keeps both the table and the filter bounded by the
+    refresh token lifetime.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._built_at = 0.0
+
+    def _get_bloom(self):
+        """
+        Return the Bloom filter, pruning and rebuilding it when it is due.
+        """
+        interval = settings.REFRESH_TOKEN_REVOCATION_REBUILD_INTERVAL
+        with self._lock:
+            if self._bloom is None or time.monotonic() - self._built_at > interval:
+                self._bloom = self._build()
+                self._built_at = time.monotonic()
+            return self._bloom
+
+    def _build(self):
+        self.prune()
+        jtis = list(RevokedToken.objects.values_list("jti", flat=True))
+        bloom = BloomFilter(
+            max(settings.REFRESH_TOKEN_REVOCATION_CAPACITY, 2 * len(jtis)),
+            settings.REFRESH_TOKEN_REVOCATION_FALSE_POSITIVE_RATE,
+        )
+        for jti in jtis:
+            bloom.add(jti)
+        return bloom
+
+    def prune(self):
+        """
+        Delete the revocations of tokens that have expired anyway.
+        """
+        return RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()[0]
+
+    def is_revoked(self, jti):
+        """
+        Return True if the token with the given jti has been revoked.
+        """
+        if jti not in self._get_bloom():
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, jti, exp):
+        """
+        Revoke the token with the given jti until its expiry.
+
+        Args:
+            jti (str): The unique identifier claim of the token.
+            exp (int): The expiry claim of the token, as a UNIX timestamp.
+
+        Returns:
+            bool: False if the token had already been revoked, e.g. by a
+                  concurrent refresh with the same token.
+        """
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(
+                    jti=jti, expires_at=datetime_from_epoch(exp)
+                )
+        except IntegrityError:
+            return False
+        finally:
+            bloom = self._get_bloom()
+            with self._lock:
+                bloom.add(jti)
+        return True
+
+
+revocation_store = RevocationStore()
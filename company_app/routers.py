@@ -0,0 +1,81 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+# The alias of the optional read replica in DATABASES
+REPLICA = "replica"
+
+# Whether the reads of the current request may go to the replica
+replica_reads = ContextVar("replica_reads", default=False)
+
+
+def get_pin_key(user_id):
+    """
+    Return the cache key marking a user as pinned to the primary.
+    """
+    return f"db:primary-pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """
+    Keep the user's reads on the primary for REPLICA_PIN_SECONDS, so they
+    read their own writes while the replica catches up.
+    """
+    if REPLICA in settings.DATABASES:
+        cache.set(get_pin_key(user_id), True, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+async def apin_to_primary(user_id):
+    """
+    Async version of `pin_to_primary`.
+    """
+    if REPLICA in settings.DATABASES:
+        await cache.aset(
+            get_pin_key(user_id), True, timeout=settings.REPLICA_PIN_SECONDS
+        )
+
+
+def start_replica_reads(user_id):
+    """
+    Send the reads of the current request to the replica, unless there is
+    none or the user wrote recently.
+    """
+    replica_reads.set(
+        REPLICA in settings.DATABASES and not cache.get(get_pin_key(user_id))
+    )
+
+
+def stop_replica_reads():
+    """
+    Send the reads of the current request back to the primary.
+    """
+    replica_reads.set(False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads to the read replica while a view has enabled it with
+    `start_replica_reads`, and everything else to the primary.
+
+    Writes always go to the primary, including saves of instances that were
+    read from the replica. Both aliases hold the same data, so relations
+    between their instances are allowed, and only the primary is migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        if replica_reads.get():
+            return REPLICA
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA:
+            return False
+        return None
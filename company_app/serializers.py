@@ -1,6 +1,15 @@
 from rest_framework import serializers
+from rest_framework.exceptions import Throttled
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.db.models import Q
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
+from .authentication import add_user_claims
+from .lockout import is_locked_out, register_failure, reset_failures
+from .revocation import revocation_store
 
 
 class CustomTokenObtainPairSerializer(serializers.Serializer):
@@ -19,6 +28,7 @@ class CustomTokenObtainPairSerializer(serializers.Serializer):
     Raises:
         serializers.ValidationError: If no user is found with the provided credentials.
         serializers.ValidationError: If the password is incorrect.
+        Throttled: If the user is locked out after too many failed attempts.
 
     Returns:
         dict: A dictionary containing the access and refresh tokens if validation succeeds.
@@ -32,18 +42,26 @@ class CustomTokenObtainPairSerializer(serializers.Serializer):
         username_or_email = attrs.get("username_or_email")
         password = attrs.get("password")
 
-        # Try to find user by email first
-        user = None
+        # Find the user by email or username with a single indexed query,
+        # an email match takes precedence like before
+        lookup = Q(username=username_or_email)
         if "@" in username_or_email:
-            try:
-                user = User.objects.get(email=username_or_email)
-            except User.DoesNotExist:
-                user = None
-        if not user:
-            try:
-                user = User.objects.get(username=username_or_email)
-            except User.DoesNotExist:
-                user = None
+            lookup |= Q(email__iexact=username_or_email)
+        candidates = list(User.objects.filter(lookup)[:10])
+        by_email = [
+            candidate
+            for candidate in candidates
+            if candidate.email.lower() == username_or_email.lower()
+        ]
+        by_username = [
+            candidate
+            for candidate in candidates
+            if candidate.username == username_or_email
+        ]
+        # An email shared by several accounts cannot identify a user
+        user = by_email[0] if len(by_email) == 1 else None
+        if not user and by_username:
+            user = by_username[0]
 
         # If no user found
         if not user:
@@ -51,14 +69,24 @@ class CustomTokenObtainPairSerializer(serializers.Serializer):
                 "Unable to log in with provided credentials."
             )
 
+        # Reject locked out users before spending any time on password hashing
+        if is_locked_out(user.pk):
+            raise Throttled(
+                wait=settings.LOGIN_LOCKOUT_SECONDS,
+                detail="Too many failed login attempts. Please try again later.",
+            )
+
         # Check password
-        if user and not user.check_password(password):
+        if not user.check_password(password):
+            register_failure(user.pk)
             raise serializers.ValidationError(
                 "Unable to log in with provided credentials."
             )
+        reset_failures(user.pk)
 
-        # Generate JWT tokens
+        # Generate JWT tokens, carrying the claims needed for DB-free authentication
         refresh = RefreshToken.for_user(user)
+        add_user_claims(refresh, user)
         access_token = str(refresh.access_token)
 
         # Return the tokens in the response
@@ -66,3 +94,47 @@ class CustomTokenObtainPairSerializer(serializers.Serializer):
             "access": access_token,
             "refresh": str(refresh),
         }
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    A refresh serializer that enforces BLACKLIST_AFTER_ROTATION through the
+    revocation store instead of the `token_blacklist` app.
+
+    Methods:
+        validate(attrs): Rejects revoked refresh tokens, revokes the token
+                         being rotated and returns the new token pair.
+
+    Raises:
+        TokenError: If the refresh token has been revoked, including when it
+                    is being rotated concurrently by another request.
+
+    Returns:
+        dict: A dictionary containing the access token, and the rotated
+              refresh token when ROTATE_REFRESH_TOKENS is enabled.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        jti = refresh[api_settings.JTI_CLAIM]
+
+        # Rejected without a query unless the Bloom filter reports a match
+        if revocation_store.is_revoked(jti):
+            raise TokenError("Token is blacklisted")
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            # The unique insert also catches a concurrent rotation of the same token
+            if api_settings.BLACKLIST_AFTER_ROTATION and not revocation_store.revoke(
+                jti, refresh["exp"]
+            ):
+                raise TokenError("Token is blacklisted")
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data["refresh"] = str(refresh)
+
+        return data
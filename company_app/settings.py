@@ -44,6 +44,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.admindocs",
+    "django.contrib.postgres",
     "django_extensions",
     "company",
     "rest_framework",
@@ -52,7 +53,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "company_app.middleware.MetricsMiddleware",
+    "company_app.middleware.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "company_app.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -93,9 +97,119 @@ DATABASES = {
         "PASSWORD": env("DB_PASSWORD"),
         "HOST": env("DB_HOST"),
         "PORT": env("DB_PORT"),
+        # Keep connections open between requests instead of reconnecting for
+        # every request, set to 0 under ASGI and use a pooler like PgBouncer
+        "CONN_MAX_AGE": env.int("DB_CONN_MAX_AGE", default=60),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Optional read replica of the default database, serving the company list and
+# retrieve endpoints (reads only, writes always go to the primary)
+if env("DB_REPLICA_HOST", default=""):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": env("DB_REPLICA_NAME", default=DATABASES["default"]["NAME"]),
+        "USER": env("DB_REPLICA_USER", default=DATABASES["default"]["USER"]),
+        "PASSWORD": env(
+            "DB_REPLICA_PASSWORD", default=DATABASES["default"]["PASSWORD"]
+        ),
+        "HOST": env("DB_REPLICA_HOST"),
+        "PORT": env("DB_REPLICA_PORT", default=DATABASES["default"]["PORT"]),
+        # Tests run against the test database of the primary
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["company_app.routers.PrimaryReplicaRouter"]
+
+# Seconds a user's reads stay on the primary after they changed a company,
+# should comfortably exceed the replication lag
+REPLICA_PIN_SECONDS = env.int("REPLICA_PIN_SECONDS", default=5)
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Point CACHE_BACKEND/CACHE_LOCATION at Redis or Memcached to share the cache
+# between workers, the local-memory default is per process
+
+CACHES = {
+    "default": {
+        "BACKEND": env(
+            "CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": env("CACHE_LOCATION", default="company-app"),
+    }
+}
+if CACHES["default"]["BACKEND"].endswith("LocMemCache"):
+    # Keep the local-memory cache bounded, a third of it is culled when full
+    CACHES["default"]["OPTIONS"] = {
+        "MAX_ENTRIES": env.int("CACHE_MAX_ENTRIES", default=10000),
+        "CULL_FREQUENCY": 3,
+    }
+
+# Lifetime in seconds of the cached company list and retrieve responses. Writes
+# invalidate an owner's responses in the cache they were made against, so with
+# the per-process local-memory cache and several workers, the other workers
+# keep serving stale responses for up to this long. Use a shared cache there,
+# or set 0 to disable the response cache
+COMPANY_CACHE_TIMEOUT = env.int("COMPANY_CACHE_TIMEOUT", default=300)
+
+# Lifetime in seconds of the responses stored for Idempotency-Key retries
+IDEMPOTENCY_KEY_TTL = env.int("IDEMPOTENCY_KEY_TTL", default=86400)
+# Seconds a request holds its Idempotency-Key at most, should it crash
+IDEMPOTENCY_LOCK_TIMEOUT = env.int("IDEMPOTENCY_LOCK_TIMEOUT", default=60)
+# Seconds a retry waits for the request holding its key before a 409
+IDEMPOTENCY_WAIT_SECONDS = env.float("IDEMPOTENCY_WAIT_SECONDS", default=10)
+
+# Serve the list, retrieve, create, update and export endpoints with native
+# async views, only worthwhile when running under an ASGI server such as
+# uvicorn, where exports are only streamed by the async view
+ASYNC_VIEWS = env.bool("ASYNC_VIEWS", default=False)
+
+# Responses smaller than this many bytes are sent uncompressed
+COMPRESSION_MIN_SIZE = env.int("COMPRESSION_MIN_SIZE", default=1024)
+
+# Bearer token required to scrape /metrics/, metrics are disabled when empty
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+
+# Send a Server-Timing header with the db, auth, template and email timings
+SERVER_TIMING = env.bool("SERVER_TIMING", default=False)
+
+# Requests slower than this many milliseconds have their SQL trace written to
+# the rotating SLOW_REQUEST_LOG_FILE, 0 disables the slow request log
+SLOW_REQUEST_THRESHOLD_MS = env.int("SLOW_REQUEST_THRESHOLD_MS", default=0)
+SLOW_REQUEST_LOG_FILE = env(
+    "SLOW_REQUEST_LOG_FILE", default=os.path.join(BASE_DIR, "slow_requests.log")
+)
+SLOW_REQUEST_LOG_MAX_BYTES = env.int("SLOW_REQUEST_LOG_MAX_BYTES", default=10485760)
+SLOW_REQUEST_LOG_BACKUP_COUNT = env.int("SLOW_REQUEST_LOG_BACKUP_COUNT", default=5)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "slow_requests": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": SLOW_REQUEST_LOG_FILE,
+            "maxBytes": SLOW_REQUEST_LOG_MAX_BYTES,
+            "backupCount": SLOW_REQUEST_LOG_BACKUP_COUNT,
+            # The file is only created once a slow request is logged
+            "delay": True,
+            "formatter": "timestamped",
+        },
+    },
+    "formatters": {
+        "timestamped": {"format": "%(asctime)s %(message)s"},
+    },
+    "loggers": {
+        "company_app.slow_requests": {
+            "handlers": ["slow_requests"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -118,7 +232,7 @@ AUTH_PASSWORD_VALIDATORS = [
 # Authentication classes
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "company_app.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -128,14 +242,42 @@ REST_FRAMEWORK = {
 # Custom JWT settings
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(
-        minutes=env("ACCESS_TOKEN_LIFETIME", default=180)
+        minutes=env.int("ACCESS_TOKEN_LIFETIME", default=180)
+    ),
+    "REFRESH_TOKEN_LIFETIME": timedelta(
+        days=env.int("REFRESH_TOKEN_LIFETIME", default=3)
     ),
-    "REFRESH_TOKEN_LIFETIME": timedelta(days=env("ACCESS_TOKEN_LIFETIME", default=3)),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
     "ALGORITHM": "HS256",
 }
 
+# How CachedJWTAuthentication resolves the request user: "db" loads it on every
+# request, "cache" keeps it in a bounded per-process LRU cache with a TTL (in
+# seconds) and "claims" builds it from the token claims without any query
+JWT_USER_LOOKUP = env("JWT_USER_LOOKUP", default="cache")
+JWT_USER_CACHE_SIZE = env.int("JWT_USER_CACHE_SIZE", default=10000)
+JWT_USER_CACHE_TTL = env.int("JWT_USER_CACHE_TTL", default=60)
+
+# Failed logins tolerated per user before the account is locked out for
+# LOGIN_LOCKOUT_SECONDS (counted in the cache, checked before password hashing)
+LOGIN_MAX_FAILED_ATTEMPTS = env.int("LOGIN_MAX_FAILED_ATTEMPTS", default=5)
+LOGIN_LOCKOUT_SECONDS = env.int("LOGIN_LOCKOUT_SECONDS", default=900)
+
+# Revocation store backing BLACKLIST_AFTER_ROTATION: the expected number of
+# revoked refresh tokens alive at once, the false positive rate of the
+# in-memory Bloom filter and how often (in seconds) expired rows are pruned
+# and the filter is rebuilt
+REFRESH_TOKEN_REVOCATION_CAPACITY = env.int(
+    "REFRESH_TOKEN_REVOCATION_CAPACITY", default=100000
+)
+REFRESH_TOKEN_REVOCATION_FALSE_POSITIVE_RATE = env.float(
+    "REFRESH_TOKEN_REVOCATION_FALSE_POSITIVE_RATE", default=0.01
+)
+REFRESH_TOKEN_REVOCATION_REBUILD_INTERVAL = env.int(
+    "REFRESH_TOKEN_REVOCATION_REBUILD_INTERVAL", default=3600
+)
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -174,6 +316,14 @@ if not env("DEV_ENV", default=True):
     EMAIL_HOST_USER = env("EMAIL_HOST_USER", default="")
     EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD", default="")
 
+# Email outbox settings (delivered by `manage.py send_outbox_emails`)
+EMAIL_OUTBOX_BATCH_SIZE = env.int("EMAIL_OUTBOX_BATCH_SIZE", default=50)
+EMAIL_OUTBOX_POLL_INTERVAL = env.float("EMAIL_OUTBOX_POLL_INTERVAL", default=5)
+EMAIL_OUTBOX_MAX_ATTEMPTS = env.int("EMAIL_OUTBOX_MAX_ATTEMPTS", default=8)
+# Backoff in seconds, doubled after every failed attempt up to the maximum
+EMAIL_OUTBOX_RETRY_DELAY = env.int("EMAIL_OUTBOX_RETRY_DELAY", default=30)
+EMAIL_OUTBOX_MAX_RETRY_DELAY = env.int("EMAIL_OUTBOX_MAX_RETRY_DELAY", default=3600)
+
 # Swagger settings
 SWAGGER_SETTINGS = {
     "SECURITY_DEFINITIONS": {
@@ -187,3 +337,6 @@ SWAGGER_SETTINGS = {
     "USE_SESSION_AUTH": False,
     "DEFAULT_MODEL_RENDERING": "example",
 }
+
+# Generate the OpenAPI schema when the server starts, otherwise on first use
+OPENAPI_SCHEMA_WARMUP = env.bool("OPENAPI_SCHEMA_WARMUP", default=True)
@@ -1,15 +1,101 @@
+import hashlib
+import threading
+
+from django.http import HttpResponse
+from django.urls import get_resolver, get_urlconf
+from django.utils.cache import get_conditional_response, patch_cache_control
 from rest_framework import permissions
-from drf_yasg.views import get_schema_view
+from drf_yasg.views import SPEC_RENDERERS, get_schema_view
 from drf_yasg import openapi
 
+# API metadata shown in the schema
+API_INFO = openapi.Info(
+    title="Company API",
+    default_version="v1",
+    description="API endpoints for Django REST API",
+    contact=openapi.Contact(email="pamelaredjepovska@gmail.com"),
+)
+
 # Define Swagger schema view (metadata, access, etc.)
 schema_view = get_schema_view(
-    openapi.Info(
-        title="Company API",
-        default_version="v1",
-        description="API endpoints for Django REST API",
-        contact=openapi.Contact(email="pamelaredjepovska@gmail.com"),
-    ),
+    API_INFO,
     public=True,
     permission_classes=(permissions.AllowAny,),
 )
+
+# The generated schema and its rendered documents, for the URL conf (resolver)
+# they were generated from
+_schema_cache = {"resolver": None, "schema": None, "documents": {}}
+_schema_lock = threading.Lock()
+
+
+def get_schema_document(renderer_class):
+    """
+    Return the schema rendered by one of drf_yasg's spec renderers.
+
+    The schema is generated on first use and kept in memory until the URL conf
+    changes, i.e. until Django builds a new URL resolver. It's generated
+    without a request, so it has no host and clients resolve the paths
+    against the URL they fetched the schema from.
+
+    Args:
+        renderer_class (type): The spec renderer, e.g. `OpenAPIRenderer`.
+
+    Returns:
+        tuple: The document as bytes and its ETag.
+    """
+    resolver = get_resolver(get_urlconf())
+    with _schema_lock:
+        if _schema_cache["resolver"] is not resolver:
+            generator = schema_view.generator_class(API_INFO, urlconf=get_urlconf())
+            _schema_cache["schema"] = generator.get_schema(request=None, public=True)
+            _schema_cache["documents"] = {}
+            _schema_cache["resolver"] = resolver
+
+        document = _schema_cache["documents"].get(renderer_class.format)
+        if document is None:
+            content = renderer_class().render(_schema_cache["schema"])
+            etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+            document = _schema_cache["documents"][renderer_class.format] = (
+                content,
+                etag,
+            )
+
+    return document
+
+
+def warm_schema_cache():
+    """
+    Generate and render the schema ahead of the first request, in every
+    format it's served in.
+    """
+    for renderer_class in SPEC_RENDERERS:
+        get_schema_document(renderer_class)
+
+
+class CachedSchemaView(schema_view):
+    """
+    Schema view serving the schema documents from memory.
+
+    drf_yasg generates the schema on every request, walking every view and
+    `swagger_auto_schema` decorator. Here it's generated once per URL conf by
+    `get_schema_document`, and served with an ETag so clients that already
+    have it get a 304. The Swagger UI page itself doesn't contain the schema
+    and is still rendered by drf_yasg.
+    """
+
+    def get(self, request, version="", format=None):
+        if not isinstance(request.accepted_renderer, tuple(SPEC_RENDERERS)):
+            return super().get(request, version, format)
+
+        content, etag = get_schema_document(type(request.accepted_renderer))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(
+                content,
+                content_type=f"{request.accepted_media_type}; charset=utf-8",
+            )
+        response["ETag"] = etag
+        # Clients may keep the schema, but have to revalidate it on every use
+        patch_cache_control(response, no_cache=True)
+        return response
@@ -1,8 +1,8 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
-from rest_framework_simplejwt.views import TokenRefreshView
-from .views import CustomTokenObtainPairView
-from .swagger import schema_view
+from .views import CustomTokenObtainPairView, CustomTokenRefreshView, metrics_view
+from .swagger import CachedSchemaView
 
 
 urlpatterns = [
@@ -10,16 +10,24 @@ urlpatterns = [
     path("admin/doc/", include("django.contrib.admindocs.urls")),
     # Admin
     path("admin/", admin.site.urls),
-    # Swagger documentation
+    # Swagger documentation, the schema is generated once and served from memory
     path(
         "swagger/",
-        schema_view.with_ui("swagger", cache_timeout=0),
+        CachedSchemaView.with_ui("swagger", cache_timeout=0),
         name="schema-swagger-ui",
     ),
     # Token obtain route for getting access and refresh tokens
     path("api/token/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"),
     # Token refresh route to obtain a new access token using the refresh token
-    path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
-    # Include the company app urls.py here
-    path("api/company/", include("company.urls")),
+    path(
+        "api/token/refresh/", CustomTokenRefreshView.as_view(), name="token_refresh"
+    ),
+    # Prometheus metrics, scraped with the METRICS_TOKEN bearer token
+    path("metrics/", metrics_view, name="metrics"),
+    # Include the company app urls.py here, with the native async views when
+    # served by an ASGI server
+    path(
+        "api/company/",
+        include("company.async_urls" if settings.ASYNC_VIEWS else "company.urls"),
+    ),
 ]
@@ -1,5 +1,12 @@
-from rest_framework_simplejwt.views import TokenObtainPairView
-from .serializers import CustomTokenObtainPairSerializer
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+
+from .metrics import render_metrics
+from .serializers import CustomTokenObtainPairSerializer, CustomTokenRefreshSerializer
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -19,3 +26,57 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     """
 
     serializer_class = CustomTokenObtainPairSerializer
+
+
+class CustomTokenRefreshView(TokenRefreshView):
+    """
+    A custom view for refreshing an access token with a refresh token.
+
+    This class overrides the default `TokenRefreshView` to use a custom
+    serializer, `CustomTokenRefreshSerializer`, which revokes rotated refresh
+    tokens in the revocation store.
+
+    Args:
+        TokenRefreshView (class): The parent view class for handling token
+                                  refreshes.
+    Attributes:
+        serializer_class (CustomTokenRefreshSerializer): The custom serializer
+                                                          used to validate
+                                                          and rotate tokens.
+    """
+
+    serializer_class = CustomTokenRefreshSerializer
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Expose the request metrics in the Prometheus text format.
+
+    The scraper has to send `Authorization: Bearer <METRICS_TOKEN>`. When no
+    token is configured the endpoint doesn't exist.
+
+    Args:
+        request (HttpRequest): The incoming request.
+
+    Returns:
+        HttpResponse: The metrics, or 401 if the token is missing or wrong.
+
+    Raises:
+        Http404: If METRICS_TOKEN is not configured.
+    """
+    if not settings.METRICS_TOKEN:
+        raise Http404
+
+    # Constant time comparison, so the token can't be guessed byte by byte
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        token.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        response = HttpResponse("Unauthorized", status=401, content_type="text/plain")
+        response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+        return response
+
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
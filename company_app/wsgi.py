@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "company_app.settings")
 
 application = get_wsgi_application()
+
+# Generate the OpenAPI schema at startup instead of on the first request
+if settings.OPENAPI_SCHEMA_WARMUP:
+    from .swagger import warm_schema_cache
+
+    warm_schema_cache()